@@ -1,18 +1,74 @@
-import os
-from fastapi import APIRouter, Query, HTTPException
-from app.core.config import DATA_DIR
-from app.services.analyze import analyze_document
+import json, os, re
+from typing import List, Literal, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from app.api.routes_jobs import accepted
+from app.core.config import TEXT_MAX_CHARS
+from app.models.text import TextAnalysisRequest
+from app.services.analyze import analyze_document, analyze_paragraphs, stream_document
+from app.services import pipeline
+from app.services.admission import client_key
+from app.services.jobs import JOBS
+from app.utils.storage import original_path
 
 router = APIRouter(tags=["analyze"])
 
+RULES_QUERY = Query(None, description="Comma-separated rules to run (default: all)")
+SKIP_QUERY = Query(None, description="Comma-separated rules to leave out")
+
+def _split(names: Optional[str]) -> Optional[List[str]]:
+    return None if names is None else [n.strip() for n in names.split(",") if n.strip()]
+
+def rule_names(rules: Optional[str], skip: Optional[str]) -> List[str]:
+    return pipeline.select(_split(rules), _split(skip))
+
+def analyze_payload(doc_id: str, path: str, rules: Optional[List[str]] = None) -> dict:
+    # module-level so the process executor can pickle it
+    return analyze_document(doc_id, path, rules).model_dump()
+
 @router.post("/analyze")
-def analyze(doc_id: str = Query(...)):
-    doc_dir = os.path.join(DATA_DIR, doc_id)
-    if not os.path.isdir(doc_dir):
-        raise HTTPException(status_code=404, detail="Document not found")
-    originals = [f for f in os.listdir(doc_dir) if f.startswith("original.")]
-    if not originals:
-        raise HTTPException(status_code=404, detail="No original file found")
-    path = os.path.join(doc_dir, originals[0])
-    report = analyze_document(doc_id, path)
-    return report.model_dump()
+def analyze(
+    request: Request,
+    doc_id: str = Query(...),
+    background: bool = Query(False, description="Run as a background job and poll /jobs/{job_id}"),
+    rules: Optional[str] = RULES_QUERY,
+    skip: Optional[str] = SKIP_QUERY,
+):
+    path = original_path(doc_id)
+    names = rule_names(rules, skip)
+    if background:
+        # the job holds the admission units for as long as it is queued or running
+        return accepted(JOBS.submit("analyze", analyze_payload, doc_id, path, names,
+                                    client=client_key(request.scope), nbytes=os.path.getsize(path)))
+    return analyze_payload(doc_id, path, names)
+
+@router.api_route("/analyze/stream", methods=["GET", "POST"])
+def analyze_stream(
+    doc_id: str = Query(...),
+    format: Literal["ndjson", "sse"] = Query("ndjson", description="NDJSON lines or server-sent events"),
+    rules: Optional[str] = RULES_QUERY,
+    skip: Optional[str] = SKIP_QUERY,
+):
+    """Issues are sent as each window of paragraphs finishes; the last record is the summary."""
+    path = original_path(doc_id)
+    records = stream_document(doc_id, path, rule_names(rules, skip))
+
+    if format == "sse":
+        body = (f"event: {r['type']}\ndata: {json.dumps(r)}\n\n" for r in records)
+        return StreamingResponse(body, media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    body = (json.dumps(r) + "\n" for r in records)
+    return StreamingResponse(body, media_type="application/x-ndjson")
+
+@router.post("/analyze/text")
+def analyze_text(body: TextAnalysisRequest):
+    """Analyze text sent in the body, fully in memory (no upload, no DATA_DIR)."""
+    if body.paragraphs is not None:
+        paragraphs = [p.strip() for p in body.paragraphs]
+    else:
+        paragraphs = [p.strip() for p in re.split(r"\n\s*\n", body.text)]
+    paragraphs = [p for p in paragraphs if p]
+    if sum(len(p) for p in paragraphs) > TEXT_MAX_CHARS:
+        raise HTTPException(status_code=413, detail=f"Text longer than {TEXT_MAX_CHARS} characters")
+    names = pipeline.select(body.rules, body.skip)
+    return analyze_paragraphs(body.doc_id, paragraphs, names, persist=False).model_dump()
@@ -0,0 +1,32 @@
+import json
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from app.api.routes_analyze import analyze_payload
+from app.api.routes_revise import revise_payload
+from app.core.config import BATCH_MAX_DOCS
+from app.models.batch import BatchRequest
+from app.services.admission import client_key
+from app.services.batch import iter_batch, run_batch
+from app.utils.storage import original_path
+
+router = APIRouter(tags=["batch"])
+
+def _respond(request: Request, body: BatchRequest, fn, stream: bool):
+    if len(body.doc_ids) > BATCH_MAX_DOCS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_DOCS} documents per batch")
+    client = client_key(request.scope)   # admission is per document, not per request
+    if stream:
+        # one NDJSON line per document, in completion order
+        lines = (json.dumps(r) + "\n" for r in iter_batch(body.doc_ids, fn, client))
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+    return {"results": run_batch(body.doc_ids, fn, client)}
+
+@router.post("/batch/analyze")
+def batch_analyze(request: Request, body: BatchRequest,
+                  stream: bool = Query(False, description="Stream NDJSON as documents finish")):
+    return _respond(request, body, lambda doc_id: analyze_payload(doc_id, original_path(doc_id)), stream)
+
+@router.post("/batch/revise")
+def batch_revise(request: Request, body: BatchRequest,
+                 stream: bool = Query(False, description="Stream NDJSON as documents finish")):
+    return _respond(request, body, lambda doc_id: revise_payload(doc_id, original_path(doc_id), body.fmt), stream)
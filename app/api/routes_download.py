@@ -1,17 +1,114 @@
-import os
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import FileResponse
-from app.core.config import DATA_DIR
+import mimetypes, os
+from typing import Iterator, Literal, Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from app.core.config import ADMISSION_RETRY_AFTER, CORRECTIONS_FILENAME
+from app.services import delivery
+from app.services.admission import ADMISSION, client_key
+from app.services.revise import render_output, rendered_output
+from app.utils import storage
 
 router = APIRouter(tags=["download"])
 
+_CHUNK = 1 << 16
+
+def _read(path: str, start: int, length: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(_CHUNK, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+def _render(request: Request, original: str, doc_dir: str, fmt: str) -> str:
+    """render_output, admitted like /revise (sized by the original) for the duration of the render only."""
+    path = rendered_output(original, doc_dir, fmt)
+    if path is not None:
+        return path   # already rendered: serving it is not heavy work
+    client = client_key(request.scope)
+    units = ADMISSION.weight(os.path.getsize(original))
+    if not ADMISSION.try_acquire(client, units):
+        raise HTTPException(status_code=429, detail="Too many documents in progress, retry later",
+                            headers={"Retry-After": str(ADMISSION_RETRY_AFTER)})
+    try:
+        return render_output(original, doc_dir, fmt)
+    finally:
+        ADMISSION.release(client, units)
+
 @router.get("/download")
 def download(
+    request: Request,
     doc_id: str = Query(..., description="Document ID returned by /upload"),
-    filename: str = Query(..., description="File in the doc folder, e.g. corrected.docx or corrected.pdf")
+    filename: Optional[str] = Query(None, description="File in the doc folder, e.g. corrected.docx or corrected.pdf"),
+    format: Optional[Literal["docx", "txt", "pdf"]] = Query(None, description="Corrected output to fetch (rendered on first request)"),
+    if_none_match: Optional[str] = Header(None),
+    if_range: Optional[str] = Header(None),
+    range_header: Optional[str] = Header(None, alias="range"),
+    accept_encoding: Optional[str] = Header(None),
 ):
-    doc_dir = os.path.join(DATA_DIR, doc_id)
-    path = os.path.join(doc_dir, filename)
+    """
+    Conditional (ETag / If-None-Match), resumable (single byte Range) and, for
+    text-like outputs, compressed (gzip/br variants cached next to the file).
+    Corrected outputs are rendered from the stored corrections on first request.
+    """
+    if (filename is None) == (format is None):
+        raise HTTPException(status_code=400, detail="Pass either filename or format")
+    filename = filename or f"corrected.{format}"
+    doc_dir = storage.doc_dir(doc_id)
+    if os.path.basename(filename) != filename:
+        raise HTTPException(status_code=404, detail="File not found")
+    stem, ext = os.path.splitext(filename)
+    if stem == "corrected" and ext in (".docx", ".txt", ".pdf") \
+            and os.path.isfile(os.path.join(doc_dir, CORRECTIONS_FILENAME)):
+        # (re)render if this format was never rendered or the corrections changed
+        path = _render(request, storage.original_path(doc_id), doc_dir, ext[1:])
+    else:
+        path = os.path.join(doc_dir, filename)
     if not os.path.isfile(path):
         raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(path, filename=filename)
+
+    digest = delivery.content_hash(path)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Cache-Control": "no-cache",   # revalidate with the ETag
+    }
+    if delivery.compressible(path):
+        headers["Vary"] = "Accept-Encoding"
+    media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    # Range requests are served from the identity representation
+    serve, encoding = path, None
+    if not range_header and delivery.compressible(path):
+        for enc in delivery.accepted_encodings(accept_encoding):
+            found = delivery.variant(path, digest, enc)
+            if found is not None:
+                serve, encoding = found, enc
+                break
+    tag = delivery.etag(digest, encoding)
+    headers["ETag"] = tag
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    if delivery.etag_matches(if_none_match, tag):
+        return Response(status_code=304, headers=headers)
+
+    size = os.path.getsize(serve)
+    byte_range = None
+    if range_header and (if_range is None or if_range.strip() == tag):
+        try:
+            byte_range = delivery.parse_range(range_header, size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(_read(serve, 0, size), media_type=media_type, headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(_read(serve, start, end - start + 1), status_code=206,
+                             media_type=media_type, headers=headers)
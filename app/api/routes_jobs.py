@@ -0,0 +1,53 @@
+import asyncio, json
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.services.jobs import JOBS, Job
+
+router = APIRouter(tags=["jobs"])
+
+def accepted(job: Job) -> JSONResponse:
+    """202 reply for a freshly submitted background job."""
+    status_url = f"/jobs/{job.id}"
+    return JSONResponse(
+        status_code=202,
+        content={**job.info(), "status_url": status_url, "result_url": f"{status_url}/result"},
+        headers={"Location": status_url},
+    )
+
+def _job(job_id: str) -> Job:
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    return _job(job_id).info()
+
+@router.get("/jobs/{job_id}/result")
+def job_result(job_id: str):
+    job = _job(job_id)
+    status = job.status
+    if status in ("queued", "running"):
+        raise HTTPException(status_code=409, detail=f"Job is {status}")
+    if status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    return job.future.result()
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent events: one `status` event per state change until the job finishes."""
+    job = _job(job_id)
+
+    async def events():
+        last = None
+        while True:
+            info = job.info()
+            if info["status"] != last:
+                last = info["status"]
+                yield f"event: status\ndata: {json.dumps(info)}\n\n"
+            if last in ("done", "failed"):
+                return
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.services import metrics, pipeline
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus text format: route and stage latency histograms plus load gauges."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/metrics/rules")
+def rule_metrics():
+    """Process-wide per-rule totals: calls, wall seconds and issues found."""
+    return {
+        "rules": {
+            name: {"category": r.category, "needs": r.needs, **pipeline.stats().get(name, {})}
+            for name, r in pipeline.RULES.items()
+        }
+    }
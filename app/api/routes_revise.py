@@ -1,29 +1,43 @@
 import os
-from typing import Literal
-from fastapi import APIRouter, Query, HTTPException
-from app.core.config import DATA_DIR
-from app.services.revise import revise_document
+from typing import Literal, Optional
+from fastapi import APIRouter, Query, Request
+from app.api.routes_jobs import accepted
+from app.services.admission import client_key
+from app.services.jobs import JOBS
+from app.services.revise import correct_document, render_output
+from app.utils.storage import original_path
 
 router = APIRouter(tags=["revise"])
 
-@router.post("/revise")
-def revise(
-    doc_id: str = Query(..., description="Document ID returned by /upload"),
-    fmt: Literal["docx", "txt", "pdf"] = Query("docx", description="Output format")
-):
-    doc_dir = os.path.join(DATA_DIR, doc_id)
-    if not os.path.isdir(doc_dir):
-        raise HTTPException(status_code=404, detail="Document not found")
-
-    originals = [f for f in os.listdir(doc_dir) if f.startswith("original.")]
-    if not originals:
-        raise HTTPException(status_code=404, detail="No original file found")
-    in_path = os.path.join(doc_dir, originals[0])
+FORMATS = ("docx", "txt", "pdf")
 
-    out_path = revise_document(in_path, doc_dir, fmt=fmt)
+def revise_payload(doc_id: str, in_path: str, fmt: Optional[str] = None) -> dict:
+    # module-level so the process executor can pickle it
+    out_dir = os.path.dirname(in_path)
+    corrections = correct_document(in_path, out_dir)
     # return a simple payload with where to fetch it from
-    return {
+    payload = {
         "doc_id": doc_id,
-        "format": fmt,
-        "corrected_path": out_path
+        "corrections_hash": corrections["hash"],
+        "paragraphs": len(corrections["corrected"]),
+        # any format is rendered on first download and then cached
+        "downloads": {f: f"/download?doc_id={doc_id}&format={f}" for f in FORMATS},
     }
+    if fmt is not None:
+        payload["format"] = fmt
+        payload["corrected_path"] = render_output(in_path, out_dir, fmt)
+    return payload
+
+@router.post("/revise")
+def revise(
+    request: Request,
+    doc_id: str = Query(..., description="Document ID returned by /upload"),
+    fmt: Optional[Literal["docx", "txt", "pdf"]] = Query(None, description="Also render this format now (default: on first download)"),
+    background: bool = Query(False, description="Run as a background job and poll /jobs/{job_id}"),
+):
+    in_path = original_path(doc_id)
+    if background:
+        # the job holds the admission units for as long as it is queued or running
+        return accepted(JOBS.submit("revise", revise_payload, doc_id, in_path, fmt,
+                                    client=client_key(request.scope), nbytes=os.path.getsize(in_path)))
+    return revise_payload(doc_id, in_path, fmt)
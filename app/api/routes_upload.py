@@ -1,9 +1,12 @@
-from fastapi import APIRouter, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File
+from app.services.extract import build_artifact
 from app.utils.storage import save_secure
 
 router = APIRouter(tags=["upload"])
 
 @router.post("/upload")
-async def upload(file: UploadFile = File(...)):
+async def upload(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     doc_id, path = await save_secure(file)
+    # extract once, after the response; /analyze and /revise read the artifact
+    background_tasks.add_task(build_artifact, path)
     return {"doc_id": doc_id, "stored_path": path}
@@ -1,6 +1,11 @@
+import os
+
 MAX_UPLOAD_BYTES = 50 * 1024 * 1024  # 50 MB soft cap
 ALLOWED_EXTENSIONS = {'.pdf', '.docx'}
 DATA_DIR = "data"
+ARTIFACT_FILENAME = "paragraphs.bin"  # extracted paragraphs, next to original.* (app/services/artifact.py)
+HASH_SIDECAR = "content.sha256"       # sha256 of original.*, written at upload
+UPLOAD_INDEX_DIRNAME = "_uploads"     # DATA_DIR/_uploads/<sha[:2]>/<sha> -> doc_id (dedup)
 MIME_ALLOW = {
     ".pdf": {"application/pdf"},
     ".docx": {
@@ -9,11 +14,120 @@ MIME_ALLOW = {
     },
 }
 
+# Process pool for the CPU-bound rules (spaCy, style scans); 0 runs them in-process.
+# Each worker loads its own spaCy model, so budget ~100 MB RSS per worker.
+ENGINE_WORKERS = 0
+ENGINE_MAX_TASKS_PER_CHILD = 200   # recycle workers to cap memory growth
+ENGINE_CHUNK_PARAGRAPHS = 200      # paragraphs per task; big documents span workers
+ENGINE_MIN_PARAGRAPHS = 8          # below this, pool overhead outweighs the gain
+
+# /revise of a PDF into PDF: patch changed text blocks on the original pages
+# (redaction + overlay) instead of re-typesetting the whole document
+PDF_REVISE_IN_PLACE = True
+# /revise of a DOCX into DOCX: edit the changed runs of the original document
+DOCX_REVISE_IN_PLACE = True
+# /revise stores the corrections once; /download renders each format on first
+# request and records which corrections it was rendered from
+CORRECTIONS_FILENAME = "corrected.json"
+RENDER_MANIFEST = "renders.json"
+DOC_LOCK_FILENAME = ".lock"   # flock'd while either file is written (all workers)
+
+# /analyze/text (in-memory, editor-plugin sized inputs)
+TEXT_MAX_CHARS = 100_000
+
+# Streaming analysis: paragraphs are analyzed in windows that start at
+# STREAM_FIRST_WINDOW (quick first results) and double up to STREAM_WINDOW_PARAGRAPHS
+STREAM_FIRST_WINDOW = 4
+STREAM_WINDOW_PARAGRAPHS = 256
+
+# Background jobs (/analyze and /revise with background=true)
+JOB_EXECUTOR = "thread"       # "thread" or "process"
+JOB_WORKERS = 2
+JOB_MAX_PENDING = 32          # queued + running; more is rejected with 429
+JOB_TTL_SECONDS = 3600        # finished jobs are forgotten after this
+
+# Batch endpoints (/batch/analyze, /batch/revise)
+BATCH_WORKERS = 4             # shared by all batch requests in the process
+BATCH_WINDOW = 4              # max in-flight documents per batch request (fairness)
+BATCH_MAX_DOCS = 10_000
+
+# Admission control for heavy requests (app/services/admission.py): each
+# request costs ceil(input bytes / ADMISSION_UNIT_BYTES) units (min 1) while
+# in flight; over a client's or the worker's budget it gets 429 + Retry-After.
+# Batches are admitted per document instead (app/services/batch.py), background
+# jobs for their whole life (app/services/jobs.py), and /download only while
+# it renders an output (app/api/routes_download.py).
+ADMISSION_PATHS = ("/analyze", "/revise")
+ADMISSION_UNIT_BYTES = 1024 * 1024
+ADMISSION_CLIENT_UNITS = 64
+ADMISSION_GLOBAL_UNITS = 256
+ADMISSION_RETRY_AFTER = 2         # seconds
+ADMISSION_TRUST_FORWARDED = False # key clients by X-Forwarded-For (only behind a trusted proxy)
+
+# /download: pre-compressed variants (gzip, plus br when the brotli module is
+# installed) for these outputs, kept only if they save DOWNLOAD_MIN_SAVING
+DOWNLOAD_COMPRESS_SUFFIXES = {".txt", ".docx"}
+DOWNLOAD_MIN_SAVING = 0.1
+DOWNLOAD_GZIP_LEVEL = 6
+DOWNLOAD_BROTLI_QUALITY = 9
+DOWNLOAD_VARIANTS_DIRNAME = ".variants"
+
+# Caches under DATA_DIR/_cache (LRU-evicted once over budget)
+CACHE_DIRNAME = "_cache"
+ANALYSIS_CACHE_MAX_BYTES = 256 * 1024 * 1024
+PARAGRAPH_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# /analyze/text is ad-hoc text: its paragraphs go to an in-process LRU instead
+TEXT_PARAGRAPH_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Startup warm-up (app/services/warmup.py): load both models on a background
+# thread and check every rule once; /ready answers 503 until that finishes.
+# A failed attempt is retried WARMUP_ATTEMPTS times in all, waiting
+# WARMUP_RETRY_SECONDS and doubling up to WARMUP_RETRY_MAX_SECONDS; after
+# that the status is "failed" and one attempt is made every
+# WARMUP_RETRY_MAX_SECONDS until the models come up.
+WARMUP_ON_STARTUP = True
+WARMUP_TEXT = "This is a smaple sentence, which was written quickly in order to warm up the checker."
+WARMUP_ATTEMPTS = 5
+WARMUP_RETRY_SECONDS = 2.0
+WARMUP_RETRY_MAX_SECONDS = 60.0
+
+# /metrics: histogram bucket bounds (seconds) and how long a DATA_DIR size is reused
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRICS_DISK_TTL_SECONDS = 30
+
 # Analyzer configuration
 READABILITY_TARGET = 55  # Flesch Reading Ease target
 LONG_SENTENCE_THRESHOLD = 25  # words
 PASSIVE_THRESHOLD_PCT = 20    # % passive sentences considered high
 
+# Models (one instance of each per worker process, see app/services/models.py)
+LT_LANGUAGE = "en-US"         # switch to en-GB if needed
+SPACY_MODEL = "en_core_web_sm"
+SPACY_DISABLE = ["ner"]
+
+# LanguageTool checking: paragraphs are packed into chunks of up to
+# LT_CHUNK_CHARS and checked concurrently by LT_WORKERS threads
+LT_CHUNK_CHARS = 20_000
+LT_WORKERS = min(8, os.cpu_count() or 1)
+# Text-level LanguageTool rules look across sentences and paragraphs, so in a
+# chunk they would see paragraphs that need not be neighbours in the document
+# (only uncached paragraphs are sent). Their matches are dropped, keeping every
+# paragraph's result a function of its own text, as the paragraph cache assumes.
+LT_TEXT_LEVEL_RULES = frozenset({
+    "ENGLISH_WORD_REPEAT_BEGINNING_RULE", "PARAGRAPH_REPEAT_BEGINNING_RULE",
+    "EN_UNPAIRED_BRACKETS", "EN_UNPAIRED_QUOTES", "PUNCTUATION_PARAGRAPH_END",
+    "STYLE_REPEATED_WORD_RULE_EN", "TOO_LONG_PARAGRAPH",
+    "READABILITY_RULE_SIMPLE", "READABILITY_RULE_DIFFICULT",
+})
+
+# spaCy parsing (one nlp.pipe pass per document, shared by all rules)
+SPACY_BATCH_SIZE = 100
+SPACY_N_PROCESS = 1           # >1 forks worker processes inside nlp.pipe
+
+# Optional JSON style guide loaded into the lexical rule engine
+# (see app/services/lexicon.load_rules for the format)
+STYLE_GUIDE_PATH = None
+
 WEIGHTS = {
     "grammar": 0.45,
     "style": 0.15,
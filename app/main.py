@@ -1,19 +1,54 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from app.api.routes_upload import router as upload_router
 from app.api.routes_analyze import router as analyze_router
 from app.api.routes_revise import router as revise_router
-from app.middleware.limits import BodySizeLimitMiddleware
+from app.middleware.limits import AdmissionMiddleware, BodySizeLimitMiddleware
+from app.middleware.metrics import MetricsMiddleware
 from app.api.routes_download import router as download_router
+from app.api.routes_jobs import router as jobs_router
+from app.api.routes_batch import router as batch_router
+from app.api.routes_metrics import router as metrics_router
+from app.services import batch, models, warmup
+from app.services.engine import ENGINE
+from app.services.jobs import JOBS
 
-app = FastAPI(title="GrammarlyAIClone")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.services import rules
+    rules.lexicon()  # a broken STYLE_GUIDE_PATH fails startup, not every request
+    warmup.start()
+    yield
+    JOBS.shutdown()
+    batch.shutdown()
+    ENGINE.shutdown()
+    # stop the LanguageTool JVM with the worker instead of leaking it
+    models.shutdown()
 
+app = FastAPI(title="GrammarlyAIClone", lifespan=lifespan)
+
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(BodySizeLimitMiddleware)
+app.add_middleware(MetricsMiddleware)  # outermost: times everything, 413s included
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    # liveness only; a failed warm-up shows here but is /ready's 503 to act on
+    state = warmup.state()
+    return {"status": "ok", "warmup": {k: state.get(k) for k in ("status", "error", "attempts")}}
+
+@app.get("/ready")
+def ready():
+    """Readiness: 503 until the startup warm-up has loaded and checked the models."""
+    state = warmup.state()
+    state["models"] = models.stats()
+    return JSONResponse(state, status_code=200 if warmup.is_ready() else 503)
 
 app.include_router(upload_router)
 app.include_router(analyze_router)
 app.include_router(revise_router)
 app.include_router(download_router)
+app.include_router(jobs_router)
+app.include_router(batch_router)
+app.include_router(metrics_router)
@@ -1,14 +1,111 @@
-from starlette.requests import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+import os
+from urllib.parse import parse_qs
 from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from app.core import config
 from app.core.config import MAX_UPLOAD_BYTES
+from app.services.admission import ADMISSION, client_key
+from app.utils.storage import original_path
 
-class BodySizeLimitMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        cl = request.headers.get("content-length")
+def _reject(status: int, detail: str, headers=None) -> JSONResponse:
+    return JSONResponse({"detail": detail}, status_code=status, headers=headers)
+
+class BodySizeLimitMiddleware:
+    """
+    Pure ASGI: rejects a declared Content-Length over MAX_UPLOAD_BYTES up front
+    and counts the body as it streams in, so chunked requests without a
+    Content-Length are cut off as soon as they pass the limit.
+    """
+    def __init__(self, app, max_bytes: int = MAX_UPLOAD_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        cl = headers.get(b"content-length")
+        if cl is not None:
+            try:
+                declared = int(cl)
+            except ValueError:
+                return await _reject(400, "Bad Content-Length")(scope, receive, send)
+            if declared > self.max_bytes:
+                return await _reject(413, "File too large")(scope, receive, send)
+
+        received = 0
+        started = False
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # handled by the app's exception middleware, or below
+                    raise HTTPException(status_code=413, detail="File too large")
+            return message
+
+        async def tracking_send(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, tracking_send)
+        except HTTPException as exc:
+            if started or exc.status_code != 413:
+                raise
+            await _reject(413, exc.detail)(scope, receive, send)
+
+_TRUE = {"1", "true", "t", "yes", "y", "on"}
+
+def _background(scope) -> bool:
+    # background=true only queues a job, which takes its own units (JobQueue.submit)
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return query.get("background", [""])[0].lower() in _TRUE
+
+def _input_bytes(scope) -> int:
+    """Size of the work a request asks for: the stored document, else the request body."""
+    doc_id = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("doc_id", [None])[0]
+    if doc_id:
+        try:
+            return os.path.getsize(original_path(doc_id))
+        except (HTTPException, OSError):
+            return 0  # unknown document: the route answers 404
+    for name, value in scope["headers"]:
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return 0
+    return 0
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI: size-weighted, per-client and global limits on in-flight heavy
+    requests (see app/services/admission.py); 429 with Retry-After when full.
+    """
+    def __init__(self, app, admission=ADMISSION, prefixes=config.ADMISSION_PATHS):
+        self.app = app
+        self.admission = admission
+        self.prefixes = tuple(prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixes) or _background(scope):
+            return await self.app(scope, receive, send)
+
+        client = client_key(scope)
+        # listdir + stat of the original: keep that filesystem work off the event loop
+        units = self.admission.weight(await run_in_threadpool(_input_bytes, scope))
+        if not self.admission.try_acquire(client, units):
+            response = _reject(429, "Too many documents in progress, retry later",
+                               headers={"Retry-After": str(config.ADMISSION_RETRY_AFTER)})
+            return await response(scope, receive, send)
         try:
-            if cl is not None and int(cl) > MAX_UPLOAD_BYTES:
-                raise HTTPException(status_code=413, detail="File too large")
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Bad Content-Length")
-        return await call_next(request)
+            await self.app(scope, receive, send)
+        finally:
+            self.admission.release(client, units)
@@ -0,0 +1,34 @@
+import time
+from app.services import metrics
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware that times every HTTP request into the route-latency
+    histogram. Labels use the matched route template (e.g. /jobs/{job_id}),
+    never the raw path, so the number of series stays bounded.
+    Streaming responses are timed until their last body chunk is sent.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        metrics.request_started()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            metrics.request_finished(
+                scope["method"], getattr(route, "path", "unmatched"), status[0],
+                time.perf_counter() - started,
+            )
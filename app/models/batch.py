@@ -0,0 +1,6 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+class BatchRequest(BaseModel):
+    doc_ids: List[str] = Field(..., min_length=1)
+    fmt: Optional[Literal["docx", "txt", "pdf"]] = None   # /batch/revise only; None: render on download
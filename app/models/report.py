@@ -22,6 +22,7 @@ class Summary(BaseModel):
     score: int
     totals: dict
     readability: dict
+    rules: dict = Field(default_factory=dict)   # per-rule calls / seconds / issues
 
 class Report(BaseModel):
     doc_id: str
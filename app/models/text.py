@@ -0,0 +1,15 @@
+from pydantic import BaseModel, model_validator
+from typing import List, Optional
+
+class TextAnalysisRequest(BaseModel):
+    text: Optional[str] = None                # paragraphs separated by blank lines
+    paragraphs: Optional[List[str]] = None
+    doc_id: str = "text"                      # echoed back in the Report
+    rules: Optional[List[str]] = None         # default: every registered rule
+    skip: Optional[List[str]] = None
+
+    @model_validator(mode="after")
+    def _one_source(self):
+        if (self.text is None) == (self.paragraphs is None):
+            raise ValueError("Provide exactly one of 'text' or 'paragraphs'")
+        return self
@@ -0,0 +1,61 @@
+"""
+Size-weighted admission control for heavy requests (/analyze, /revise, /batch).
+Each request costs one unit per ADMISSION_UNIT_BYTES of input (at least one),
+held until its response has been sent; a batch holds units per document while
+that document runs. A request is rejected, not queued, when it would take its
+client or the whole worker past its unit budget, so a few huge uploads cannot
+starve everyone else.
+"""
+from __future__ import annotations
+import threading
+from typing import Dict
+from app.core import config
+
+def client_key(scope) -> str:
+    """Who a request is charged to: its peer address, or X-Forwarded-For behind a trusted proxy."""
+    if config.ADMISSION_TRUST_FORWARDED:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+class Admission:
+    def __init__(self, global_units: int = config.ADMISSION_GLOBAL_UNITS,
+                 client_units: int = config.ADMISSION_CLIENT_UNITS):
+        self.global_units = global_units
+        self.client_units = client_units
+        self.in_flight = 0
+        self.rejected = 0
+        self._clients: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def weight(self, nbytes: int) -> int:
+        units = max(1, -(-nbytes // config.ADMISSION_UNIT_BYTES))
+        # a document bigger than any budget still runs, alone
+        return min(units, self.client_units, self.global_units)
+
+    def try_acquire(self, client: str, units: int) -> bool:
+        with self._lock:
+            held = self._clients.get(client, 0)
+            if held + units > self.client_units or self.in_flight + units > self.global_units:
+                self.rejected += 1
+                return False
+            self._clients[client] = held + units
+            self.in_flight += units
+            return True
+
+    def release(self, client: str, units: int) -> None:
+        with self._lock:
+            self.in_flight -= units
+            left = self._clients.get(client, 0) - units
+            if left > 0:
+                self._clients[client] = left
+            else:
+                self._clients.pop(client, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"in_flight_units": self.in_flight, "clients": len(self._clients), "rejected": self.rejected}
+
+ADMISSION = Admission()
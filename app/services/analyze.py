@@ -1,43 +1,96 @@
 from __future__ import annotations
-from typing import List, Dict
-import os
-from language_tool_python import LanguageTool
-import spacy
-from app.services.extract import extract_text
+from typing import Dict, Iterable, Iterator, List, Optional
+import hashlib, json
+from app.services.extract import iter_digested_paragraphs
 from app.services import rules as R
+from app.services.cache import REPORTS, PARAGRAPHS, TEXT_PARAGRAPHS
+from app.services import pipeline
+from app.services.engine import ENGINE
+from app.services.metrics import stage
 from app.models.report import Report, Issue, Summary
-from app.core.config import DATA_DIR, WEIGHTS, READABILITY_TARGET
-
-# Lazy singletons
-_LT = None
-def LT():
-    global _LT
-    if _LT is None:
-        _LT = LanguageTool("en-US")  # switch to en-GB if needed
-    return _LT
-
-_NLP = None
-def NLP():
-    global _NLP
-    if _NLP is None:
-        _NLP = spacy.load("en_core_web_sm", disable=["ner"])
-    return _NLP
-
-def lt_issues(paragraphs: List[str]) -> List[Dict]:
-    issues: List[Dict] = []
-    for pi, p in enumerate(paragraphs):
-        matches = LT().check(p)
-        for m in matches:
-            suggestion = ", ".join(m.replacements[:3]) if m.replacements else None
-            issues.append({
-                "category": "grammar",
-                "severity": "high" if m.ruleIssueType in ("misspelling", "typographical") else "medium",
-                "message": m.message,
-                "rule": m.ruleId,
-                "location": {"paragraph": pi, "start": m.offset, "end": m.offset + m.errorLength},
-                "suggestion": suggestion,
-            })
-    return issues
+from app.core import config
+from app.core.config import WEIGHTS, READABILITY_TARGET
+from app.utils.storage import file_sha256
+
+# Bump when rule logic changes so cached results from older code are ignored
+ANALYZER_VERSION = 4
+
+def analyzer_fingerprint() -> str:
+    """Hash of every setting that can change a Report for the same input."""
+    settings = {
+        "version": ANALYZER_VERSION,
+        "weights": config.WEIGHTS,
+        "readability_target": config.READABILITY_TARGET,
+        "long_sentence_threshold": config.LONG_SENTENCE_THRESHOLD,
+        "passive_threshold_pct": config.PASSIVE_THRESHOLD_PCT,
+        "lt_language": config.LT_LANGUAGE,
+        "lt_text_level_rules": sorted(config.LT_TEXT_LEVEL_RULES),   # dropped matches
+        "spacy_model": config.SPACY_MODEL,
+        "lexicon": R.lexicon().fingerprint,   # word lists + style guide
+    }
+    blob = json.dumps(settings, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+def paragraph_key(text: str, fingerprint: str, digest: Optional[str] = None) -> str:
+    # digest: the sha256 of the text if already known (stored in the upload artifact)
+    digest = digest or hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{fingerprint}\0{digest}".encode("utf-8")).hexdigest()
+
+def _fresh_buckets(paragraphs: List[str], names: List[str], timings: Dict[str, Dict]) -> List[Dict[str, List[Dict]]]:
+    """Run the named rules over `paragraphs`; one {rule: issues} bucket per paragraph."""
+    buckets: List[Dict[str, List[Dict]]] = [{name: [] for name in names} for _ in paragraphs]
+    pooled = [n for n in names if pipeline.RULES[n].pooled]
+    cpu_rules = ENGINE.submit(paragraphs, pooled)  # runs in the process pool while LT checks
+    found, local_timings = pipeline.run(R.AnalysisContext(paragraphs), [n for n in names if n not in pooled])
+    pooled_found, pooled_timings = cpu_rules.result()
+    found.update(pooled_found)
+    for t in (local_timings, pooled_timings):
+        pipeline.record(t)
+        pipeline.merge(timings, t)
+    for name, issues in found.items():
+        for issue in issues:
+            buckets[issue["location"]["paragraph"]][name].append(issue)
+    return buckets
+
+def paragraph_issues(paragraphs: List[str], rules: Optional[List[str]] = None,
+                     timings: Optional[Dict[str, Dict]] = None, persist: bool = True,
+                     digests: Optional[List[Optional[str]]] = None) -> List[Dict[str, List[Dict]]]:
+    """
+    {rule: issues} for each paragraph. Rules already run on a paragraph (same text,
+    same analyzer settings) come from the paragraph cache; only what is missing is
+    sent to LanguageTool and spaCy. Locations are remapped to current indices.
+    persist=False uses the in-process cache instead of the one on disk; digests,
+    when known, spare hashing each paragraph for its cache key.
+    """
+    names = pipeline.select(rules)
+    cache = PARAGRAPHS if persist else TEXT_PARAGRAPHS
+    timings = {} if timings is None else timings
+    fingerprint = analyzer_fingerprint()
+    digests = digests or [None] * len(paragraphs)
+    keys = [paragraph_key(p, fingerprint, d) for p, d in zip(paragraphs, digests)]
+    cached = [cache.get(k) or {} for k in keys]
+    missing = [pi for pi, b in enumerate(cached) if any(n not in b for n in names)]
+    if missing:
+        needed = [n for n in names if any(n not in cached[pi] for pi in missing)]
+        fresh = _fresh_buckets([paragraphs[pi] for pi in missing], needed, timings)
+        for pi, bucket in zip(missing, fresh):
+            cached[pi].update(bucket)
+            cache.put(keys[pi], cached[pi])
+    buckets = [{n: b[n] for n in names} for b in cached]
+    for pi, bucket in enumerate(buckets):
+        for issues in bucket.values():
+            for issue in issues:
+                issue["location"]["paragraph"] = pi
+    return buckets
+
+def cached_grammar(paragraphs: List[str]) -> List[Optional[List[Dict]]]:
+    """LanguageTool issues from the paragraph cache, or None where a paragraph was never checked."""
+    fingerprint = analyzer_fingerprint()
+    out: List[Optional[List[Dict]]] = []
+    for p in paragraphs:
+        bucket = PARAGRAPHS.get(paragraph_key(p, fingerprint)) or {}
+        out.append(bucket.get("grammar"))
+    return out
 
 def score_from_counts(counts: Dict, readability: Dict) -> int:
     # Simple weighted score: start at 100 and subtract penalties
@@ -52,31 +105,142 @@ def score_from_counts(counts: Dict, readability: Dict) -> int:
         penalties += (READABILITY_TARGET - fre) * 0.3
     return max(0, int(100 - min(100, penalties)))
 
-def analyze_document(doc_id: str, path: str) -> Report:
-    paragraphs = extract_text(path)
-    full_text = "\n\n".join(paragraphs)
+def _windows(paragraphs: Iterable[str]) -> Iterator[List[str]]:
+    """Group streamed paragraphs into windows that start small (fast first results) and double."""
+    size = config.STREAM_FIRST_WINDOW
+    window: List[str] = []
+    for p in paragraphs:
+        window.append(p)
+        if len(window) >= size:
+            yield window
+            window = []
+            size = min(size * 2, config.STREAM_WINDOW_PARAGRAPHS)
+    if window:
+        yield window
 
-    # Collect issues
-    grammar = lt_issues(paragraphs)
-    style = R.style_weasel_jargon(paragraphs)
-    clarity = R.clarity_long_sentences(paragraphs) + R.passive_voice_issues(paragraphs)
+def iter_analysis(paragraphs: Iterable, rules: Optional[List[str]] = None,
+                  persist: bool = True, digested: bool = False) -> Iterator[Dict]:
+    """
+    Streaming analysis: consumes paragraphs lazily (e.g. iter_paragraphs) and
+    yields one {"type": "issues"} event ({rule: issues}) per window of paragraphs,
+    then a final {"type": "summary"} event. Only one window of text is held at a time.
+    digested=True takes (text, sha256) pairs, as from iter_digested_paragraphs.
+    """
+    names = pipeline.select(rules)
+    counts = {"grammar": 0, "style": 0, "clarity": 0}
+    rule_issues = {n: 0 for n in names}
+    timings: Dict[str, Dict] = {}
+    tally = R.ReadabilityTally()
+    offset = 0
+    for window in _windows(paragraphs):
+        digests = None
+        if digested:
+            window, digests = [t for t, _ in window], [d for _, d in window]
+        buckets = paragraph_issues(window, names, timings, persist, digests)
+        issues: Dict[str, List[Dict]] = {n: [] for n in names}
+        for b in buckets:
+            for name, found in b.items():
+                for issue in found:
+                    issue["location"]["paragraph"] += offset
+                    issues[name].append(issue)
+        for name, found in issues.items():
+            counts[pipeline.RULES[name].category] += len(found)
+            rule_issues[name] += len(found)
+        with stage("readability"):
+            tally.add("\n\n".join(window))
+        yield {"type": "issues", "paragraphs": [offset, offset + len(window)], "issues": issues}
+        offset += len(window)
 
-    all_issues = grammar + style + clarity
-
-    # Tally
-    counts = {"grammar": len(grammar), "style": len(style), "clarity": len(clarity)}
-    readability = R.readability_metrics(full_text)
+    with stage("readability"):
+        readability = tally.metrics()
     score = score_from_counts(counts, readability)
+    rule_stats = {}
+    for name in names:
+        t = timings.get(name, {"calls": 0, "seconds": 0.0})
+        # calls/seconds cover fresh work only; issues include cached paragraphs
+        rule_stats[name] = {"calls": t["calls"], "seconds": round(t["seconds"], 6), "issues": rule_issues[name]}
+    summary = Summary(score=score, totals=dict(counts), readability=readability, rules=rule_stats)
+    yield {"type": "summary", "summary": summary}
+
+def build_issue(i: Dict) -> Issue:
+    loc = i["location"]
+    return Issue(
+        # stable across runs and paths: rule + where it points
+        id=f"{i.get('rule') or i['category']}-{loc['paragraph']}-{loc['start']}-{loc['end'] - loc['start']}",
+        category=i["category"], severity=i["severity"], message=i["message"],
+        suggestion=i.get("suggestion"), rule=i.get("rule"),
+        location=i["location"]
+    )
+
+def _cache_key(path: str, names: List[str]) -> str:
+    # Same bytes + same analyzer settings + same rules -> same Report, whatever the doc_id
+    return f"{file_sha256(path)}-{analyzer_fingerprint()}-{'+'.join(names)}"
+
+def in_document_order(issues: Dict[str, List[Dict]]) -> List[Dict]:
+    """
+    One window's {rule: issues} flattened by position (registry order on ties).
+    Windows are consecutive, so /analyze, a live stream and a replayed stream
+    all list a document's issues in the same order.
+    """
+    flat = [i for found in issues.values() for i in found]
+    return sorted(flat, key=lambda i: (i["location"]["paragraph"], i["location"]["start"]))
+
+def _report(doc_id: str, found: List[Dict], summary: Summary) -> Report:
+    issues_models = [build_issue(i) for i in found]
+    return Report(doc_id=doc_id, score=summary.score, issues=issues_models, summary=summary)
+
+def analyze_document(doc_id: str, path: str, rules: Optional[List[str]] = None) -> Report:
+    names = pipeline.select(rules)
+    cache_key = _cache_key(path, names)
+    cached = REPORTS.get(cache_key)
+    if cached is not None:
+        cached["doc_id"] = doc_id
+        return Report.model_validate(cached)
+
+    report = analyze_paragraphs(doc_id, iter_digested_paragraphs(path), names, digested=True)
+    REPORTS.put(cache_key, report.model_dump())
+    return report
+
+def analyze_paragraphs(doc_id: str, paragraphs: Iterable, rules: Optional[List[str]] = None,
+                       persist: bool = True, digested: bool = False) -> Report:
+    """
+    Full rule pipeline over in-memory (or streamed) paragraphs; no file involved.
+    persist=False keeps paragraph results out of the disk cache.
+    """
+    names = pipeline.select(rules)
+    # Collect issues window by window (unchanged paragraphs come from the paragraph cache)
+    found: List[Dict] = []
+    summary = None
+    for event in iter_analysis(paragraphs, names, persist, digested):
+        if event["type"] == "issues":
+            found.extend(in_document_order(event["issues"]))
+        else:
+            summary = event["summary"]
+    return _report(doc_id, found, summary)
+
+def stream_document(doc_id: str, path: str, rules: Optional[List[str]] = None) -> Iterator[Dict]:
+    """
+    Records for a streamed /analyze: {"type": "issue", ...} as soon as each window
+    of paragraphs is checked, then one {"type": "summary", ...}. Cached Reports are
+    replayed; a finished stream stores its Report for later /analyze calls.
+    """
+    names = pipeline.select(rules)
+    cache_key = _cache_key(path, names)
+    cached = REPORTS.get(cache_key)
+    if cached is not None:
+        for issue in cached["issues"]:
+            yield {"type": "issue", **issue}
+        yield {"type": "summary", "doc_id": doc_id, **cached["summary"]}
+        return
 
-    # Build pydantic Report
-    issues_models = [
-        Issue(
-            id=f"{i}-{k}",
-            category=i["category"], severity=i["severity"], message=i["message"],
-            suggestion=i.get("suggestion"), rule=i.get("rule"),
-            location=i["location"]
-        )
-        for k, i in enumerate(all_issues, start=1)
-    ]
-    summary = Summary(score=score, totals=counts, readability=readability)
-    return Report(doc_id=doc_id, score=score, issues=issues_models, summary=summary)
+    found: List[Dict] = []
+    for event in iter_analysis(iter_digested_paragraphs(path), names, digested=True):
+        if event["type"] == "summary":
+            summary = event["summary"]
+            REPORTS.put(cache_key, _report(doc_id, found, summary).model_dump())
+            yield {"type": "summary", "doc_id": doc_id, **summary.model_dump()}
+            return
+        issues = in_document_order(event["issues"])
+        found.extend(issues)
+        for i in issues:
+            yield {"type": "issue", **build_issue(i).model_dump()}
@@ -0,0 +1,111 @@
+"""
+Compact on-disk paragraph artifact, written once per upload next to original.*.
+
+Layout (little-endian):
+    header   magic "GACP", version u16, flags u16, count u32,
+             source size u64, source mtime_ns i64
+    records  count x (page i32, x0 y0 x1 y1 f64, text offset u64,
+             text length u32, sha256 of the text 32 bytes)
+    texts    UTF-8 paragraph texts, back to back
+
+Readers mmap the file, so opening it costs a few syscalls and a paragraph is
+decoded only when it is read. The source size and mtime are checked on open;
+an artifact that no longer matches its original is ignored.
+"""
+from __future__ import annotations
+import hashlib, mmap, os, struct, tempfile
+from typing import Iterable, Iterator, Optional, Tuple
+from app.core import config
+
+Rect = Tuple[float, float, float, float]
+MAGIC = b"GACP"
+VERSION = 1
+FLAG_BLOCKS = 1          # records carry real PDF page numbers and rects
+_HEADER = struct.Struct("<4sHHIQq")
+_RECORD = struct.Struct("<i4dQI32s")
+
+def artifact_path(source: str) -> str:
+    return os.path.join(os.path.dirname(source), config.ARTIFACT_FILENAME)
+
+def write(source: str, blocks: Iterable[Tuple[int, Rect, str]], has_blocks: bool) -> str:
+    """Write the artifact for `source` from (page, rect, text) triples; atomic replace."""
+    records, texts, offset = [], [], 0
+    for page, rect, text in blocks:
+        data = text.encode("utf-8")
+        records.append(_RECORD.pack(page, *rect, offset, len(data), hashlib.sha256(data).digest()))
+        texts.append(data)
+        offset += len(data)
+    st = os.stat(source)
+    header = _HEADER.pack(MAGIC, VERSION, FLAG_BLOCKS if has_blocks else 0, len(records), st.st_size, st.st_mtime_ns)
+    dest = artifact_path(source)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dest), prefix=".artifact-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(b"".join(records))
+            f.write(b"".join(texts))
+        os.replace(tmp, dest)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return dest
+
+class Artifact:
+    """Read-only, mmap-backed view of one artifact. Use as a context manager."""
+    def __init__(self, mm: mmap.mmap, flags: int, count: int):
+        self._mm = mm
+        self.has_blocks = bool(flags & FLAG_BLOCKS)
+        self.count = count
+        self._texts = _HEADER.size + count * _RECORD.size
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _record(self, i: int) -> tuple:
+        return _RECORD.unpack_from(self._mm, _HEADER.size + i * _RECORD.size)
+
+    def text(self, i: int) -> str:
+        _, _, _, _, _, offset, length, _ = self._record(i)
+        start = self._texts + offset
+        return self._mm[start:start + length].decode("utf-8")
+
+    def block(self, i: int) -> Tuple[int, Rect, str]:
+        page, x0, y0, x1, y1, _, _, _ = self._record(i)
+        return page, (x0, y0, x1, y1), self.text(i)
+
+    def digest(self, i: int) -> str:
+        return self._record(i)[7].hex()
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.text(i) for i in range(self.count))
+
+    def blocks(self) -> Iterator[Tuple[int, Rect, str]]:
+        return (self.block(i) for i in range(self.count))
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def __enter__(self) -> "Artifact":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def load(source: str) -> Optional[Artifact]:
+    """The artifact for `source`, or None if it is missing, stale or unreadable."""
+    try:
+        st = os.stat(source)
+        with open(artifact_path(source), "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):   # ValueError: mmap of an empty file
+        return None
+    try:
+        tag, version, flags, count, size, mtime_ns = _HEADER.unpack_from(mm, 0)
+        ok = (tag == MAGIC and version == VERSION and size == st.st_size
+              and mtime_ns == st.st_mtime_ns and len(mm) >= _HEADER.size + count * _RECORD.size)
+    except struct.error:
+        ok = False
+    if not ok:
+        mm.close()
+        return None
+    return Artifact(mm, flags, count)
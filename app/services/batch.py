@@ -0,0 +1,97 @@
+"""
+Shared scheduler for batch requests.
+All batches run on one process-wide thread pool (and so share the model
+registry); each batch keeps at most BATCH_WINDOW documents in flight, so
+concurrent batches take turns on the pool instead of queueing behind the
+first large one. Given the client, each document also holds admission units
+(sized by its original) while it runs, rather than the batch being weighed by
+its request body.
+"""
+from __future__ import annotations
+import os, threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from fastapi import HTTPException
+from app.core import config
+from app.services.admission import ADMISSION
+from app.utils.storage import original_path
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+def _pool() -> ThreadPoolExecutor:
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = ThreadPoolExecutor(max_workers=config.BATCH_WORKERS, thread_name_prefix="batch")
+    return _POOL
+
+def _record(doc_id: str, f: Future) -> Dict[str, Any]:
+    exc = f.exception()
+    if exc is None:
+        return {"doc_id": doc_id, "status": 200, "result": f.result()}
+    if isinstance(exc, HTTPException):
+        return {"doc_id": doc_id, "status": exc.status_code, "error": exc.detail}
+    return {"doc_id": doc_id, "status": 500, "error": f"{type(exc).__name__}: {exc}"}
+
+def _units(doc_id: str) -> int:
+    try:
+        return ADMISSION.weight(os.path.getsize(original_path(doc_id)))
+    except (HTTPException, OSError):
+        return ADMISSION.weight(0)  # unknown document: fn answers 404
+
+def _busy(doc_id: str) -> Dict[str, Any]:
+    return {"doc_id": doc_id, "status": 429, "error": "Too many documents in progress, retry later"}
+
+def iter_batch(doc_ids: Iterable[str], fn: Callable[[str], Any],
+               client: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Run fn(doc_id) once per distinct id (a repeated id would only race itself
+    on the same files); yield one record per document in completion order.
+    With a client, a document that does not fit its admission budget waits for
+    one of the batch's own documents to finish, or is answered 429 when the
+    batch has nothing in flight to wait for.
+    """
+    ids = iter(dict.fromkeys(doc_ids))   # first occurrence keeps its place
+    pending: Dict[Future, str] = {}
+    held: List[str] = []   # next document, waiting for admission units
+
+    def fill() -> Iterator[Dict[str, Any]]:
+        while len(pending) < config.BATCH_WINDOW:
+            doc_id = held.pop() if held else next(ids, None)
+            if doc_id is None:
+                return
+            units = 0
+            if client is not None:
+                units = _units(doc_id)
+                if not ADMISSION.try_acquire(client, units):
+                    if pending:
+                        held.append(doc_id)
+                        return
+                    yield _busy(doc_id)
+                    continue
+            f = _pool().submit(fn, doc_id)
+            if units:
+                # released when the document finishes, even if the response is abandoned
+                f.add_done_callback(lambda _, u=units: ADMISSION.release(client, u))
+            pending[f] = doc_id
+
+    yield from fill()
+    while pending:
+        done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+        for f in done:
+            yield _record(pending.pop(f), f)
+        yield from fill()
+
+def run_batch(doc_ids: List[str], fn: Callable[[str], Any],
+              client: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Like iter_batch, but collected back into request order."""
+    order = {doc_id: k for k, doc_id in enumerate(dict.fromkeys(doc_ids))}
+    return sorted(iter_batch(doc_ids, fn, client), key=lambda r: order[r["doc_id"]])
+
+def shutdown() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+            _POOL = None
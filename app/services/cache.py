@@ -0,0 +1,155 @@
+"""
+Persistent, size-bounded caches under DATA_DIR.
+Entries are JSON files sharded by key prefix; eviction is LRU by file mtime,
+which get() refreshes on every hit. MemoryCache is the same interface kept
+in-process, for results not worth writing to disk.
+"""
+from __future__ import annotations
+import json, os, tempfile, threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from app.core import config
+
+class DiskCache:
+    def __init__(self, namespace: str, max_bytes: int):
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size: Optional[int] = None   # bytes on disk, scanned lazily
+        self._lock = threading.Lock()
+
+    @property
+    def root(self) -> str:
+        # resolved per call so tests (and deployments) can repoint DATA_DIR
+        return os.path.join(config.DATA_DIR, config.CACHE_DIRNAME, self.namespace)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def _files(self) -> list[tuple[float, int, str]]:
+        out = []
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                p = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                out.append((st.st_mtime, st.st_size, p))
+        return out
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        try:
+            replaced = os.path.getsize(path)  # overwriting a key frees the old entry
+        except OSError:
+            replaced = 0
+        os.replace(tmp, path)  # atomic: readers never see a partial entry
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._files())
+            else:
+                self._size += len(data) - replaced
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # rescan so entries written by other worker processes are counted too
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._size = total
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "bytes": self._size,
+        }
+
+class MemoryCache:
+    """In-process LRU with DiskCache's interface; values are stored as JSON so get() returns a copy."""
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return json.loads(data)
+
+    def put(self, key: str, value: Any) -> None:
+        data = json.dumps(value, separators=(",", ":"))
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, dropped = self._entries.popitem(last=False)
+                self._size -= len(dropped)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "bytes": self._size,
+            }
+
+# Full Report results, keyed by original-file hash + analyzer fingerprint
+REPORTS = DiskCache("reports", config.ANALYSIS_CACHE_MAX_BYTES)
+
+# Per-paragraph issue buckets, keyed by paragraph text hash + analyzer fingerprint
+PARAGRAPHS = DiskCache("paragraphs", config.PARAGRAPH_CACHE_MAX_BYTES)
+
+# The same buckets for /analyze/text, which must not leave anything under DATA_DIR
+TEXT_PARAGRAPHS = MemoryCache(config.TEXT_PARAGRAPH_CACHE_MAX_BYTES)
@@ -0,0 +1,116 @@
+"""
+HTTP delivery helpers for /download: strong ETags from the content hash,
+Accept-Encoding negotiation with pre-compressed variants cached on disk,
+and single byte-range parsing.
+
+Variants live in <doc dir>/.variants/<file>.<sha256>.<gz|br>; the hash in the
+name means a re-rendered output never serves a stale variant, and older
+variants of the same file are removed when a new one is written.
+"""
+from __future__ import annotations
+import gzip, os, re, tempfile
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from app.core import config
+from app.utils.storage import file_sha256
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+_SUFFIX = {"br": "br", "gzip": "gz"}
+
+@lru_cache(maxsize=1024)
+def _digest(path: str, size: int, mtime_ns: int) -> str:
+    return file_sha256(path)
+
+def content_hash(path: str) -> str:
+    """sha256 of a file, hashed once per (size, mtime) rather than per request."""
+    st = os.stat(path)
+    return _digest(path, st.st_size, st.st_mtime_ns)
+
+def etag(digest: str, encoding: Optional[str] = None) -> str:
+    # strong validator; each encoding is its own representation
+    return f'"{digest}-{_SUFFIX[encoding]}"' if encoding else f'"{digest}"'
+
+def etag_matches(if_none_match: Optional[str], tag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison: ignore any W/ prefix
+    return any(t.strip().removeprefix("W/") == tag for t in if_none_match.split(","))
+
+def compressible(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in config.DOWNLOAD_COMPRESS_SUFFIXES
+
+def accepted_encodings(accept_encoding: Optional[str]) -> List[str]:
+    """Encodings we can serve that the client accepts, best first (br, then gzip)."""
+    offered = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        m = re.search(r"q=([0-9.]+)", params)
+        if m:
+            try:
+                q = float(m.group(1))
+            except ValueError:
+                q = 0.0
+        if name:
+            offered[name.lower()] = q
+    wanted = ["br", "gzip"] if brotli is not None else ["gzip"]
+    return [e for e in wanted if offered.get(e, offered.get("*", 0.0)) > 0]
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=config.DOWNLOAD_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=config.DOWNLOAD_GZIP_LEVEL, mtime=0)
+
+def variant(path: str, digest: str, encoding: str) -> Optional[str]:
+    """
+    Path of the `encoding` variant of `path`, compressing it on first request.
+    None when compression does not save at least DOWNLOAD_MIN_SAVING (e.g. a
+    DOCX, which is already a zip); the identity file is served instead.
+    """
+    folder = os.path.join(os.path.dirname(path), config.DOWNLOAD_VARIANTS_DIRNAME)
+    name = os.path.basename(path)
+    dest = os.path.join(folder, f"{name}.{digest}.{_SUFFIX[encoding]}")
+    if not os.path.exists(dest):
+        os.makedirs(folder, exist_ok=True)
+        with open(path, "rb") as f:
+            data = _compress(f.read(), encoding)
+        fd, tmp = tempfile.mkstemp(dir=folder, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, dest)
+        for old in os.listdir(folder):
+            if old.startswith(f"{name}.") and not old.startswith(f"{name}.{digest}."):
+                try:
+                    os.remove(os.path.join(folder, old))
+                except OSError:
+                    pass
+    if os.path.getsize(dest) > os.path.getsize(path) * (1 - config.DOWNLOAD_MIN_SAVING):
+        return None
+    return dest
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) inclusive for a single "bytes=" range; None to serve the whole
+    file (no header, a malformed one, or a multi-range request). Raises
+    ValueError when the range is well-formed but cannot be satisfied.
+    """
+    m = re.fullmatch(r"bytes=(\d*)-(\d*)", (header or "").strip())
+    if m is None or m.group(1) == m.group(2) == "":
+        return None
+    first, last = m.groups()
+    if first == "":                          # suffix: the last N bytes
+        n = int(last)
+        if n == 0 or size == 0:
+            raise ValueError(header)
+        return max(0, size - n), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, min(end, size - 1)
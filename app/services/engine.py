@@ -0,0 +1,103 @@
+"""
+Process-pool engine for the CPU-bound pipeline rules (spaCy parsing, style scans),
+so concurrent analyses use every core instead of serializing on the GIL.
+Each worker preloads its own spaCy pipeline. LanguageTool stays in the parent:
+it is already a separate server process.
+"""
+from __future__ import annotations
+import multiprocessing, sys, threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from app.core import config
+from app.services import models, pipeline
+from app.services import rules as R
+
+def run_rules(paragraphs: List[str], names: List[str], start: int = 0) -> Tuple[Dict[str, List[Dict]], Dict[str, Dict]]:
+    """The named rules over `paragraphs`, numbered from paragraph `start`: ({rule: issues}, {rule: timing})."""
+    ctx = R.AnalysisContext(paragraphs)  # spaCy parses each paragraph once for all rules
+    found, timings = pipeline.run(ctx, names)
+    if start:
+        for issues in found.values():
+            for issue in issues:
+                issue["location"]["paragraph"] += start
+    return found, timings
+
+def _init_worker() -> None:
+    models.nlp()  # load once per child, not per task
+
+class AnalysisEngine:
+    def __init__(self, workers: int, max_tasks_per_child: int):
+        self.workers = workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._submitted = 0
+        self._lock = threading.Lock()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        kwargs = {}
+        if self.max_tasks_per_child and sys.version_info >= (3, 11):
+            # native per-worker recycling; not supported with the fork start method
+            kwargs = {"mp_context": multiprocessing.get_context("spawn"),
+                      "max_tasks_per_child": self.max_tasks_per_child}
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, **kwargs)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = self._new_pool()
+            elif (self.max_tasks_per_child and sys.version_info < (3, 11)
+                  and self._submitted >= self.workers * self.max_tasks_per_child):
+                # older Pythons: rotate the whole pool; queued tasks still finish
+                self._pool.shutdown(wait=False)
+                self._pool = self._new_pool()
+                self._submitted = 0
+            self._submitted += 1
+            return self._pool
+
+    def submit(self, paragraphs: List[str], names: List[str]) -> Future:
+        """
+        Schedule the named CPU-bound rules for a document; resolves to
+        ({rule: issues}, {rule: timing}). Small documents (or workers=0) run
+        inline and return a completed future.
+        """
+        if self.workers <= 0 or len(paragraphs) < config.ENGINE_MIN_PARAGRAPHS:
+            done: Future = Future()
+            done.set_result(run_rules(paragraphs, names))
+            return done
+
+        size = config.ENGINE_CHUNK_PARAGRAPHS
+        parts = [
+            self._get_pool().submit(run_rules, paragraphs[i:i + size], names, i)
+            for i in range(0, len(paragraphs), size)
+        ]
+        merged: Future = Future()
+        remaining = [len(parts)]
+        lock = threading.Lock()
+
+        def _gather(_f: Future) -> None:
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            try:
+                results = [p.result() for p in parts]
+            except BaseException as exc:
+                merged.set_exception(exc)
+                return
+            found = {name: [i for r, _ in results for i in r[name]] for name in names}
+            timings: Dict[str, Dict] = {}
+            for _, t in results:
+                pipeline.merge(timings, t)
+            merged.set_result((found, timings))
+
+        for p in parts:
+            p.add_done_callback(_gather)
+        return merged
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+ENGINE = AnalysisEngine(config.ENGINE_WORKERS, config.ENGINE_MAX_TASKS_PER_CHILD)
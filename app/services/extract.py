@@ -1,29 +1,106 @@
-import os
-import fitz          # PyMuPDF
-import docx          # python-docx
+import logging, os
+from typing import Iterator, Optional, Tuple
+from app.services import artifact
+from app.services.metrics import timed_iter
 
-def extract_text(path: str) -> list[str]:
+Rect = Tuple[float, float, float, float]
+
+logger = logging.getLogger(__name__)
+
+def _pdf_blocks(path: str) -> Iterator[Tuple[int, Rect, str]]:
+    import fitz  # PyMuPDF; imported on first use to keep app start-up light
+    with fitz.open(path) as doc:
+        for pno, page in enumerate(doc):
+            # 'blocks' yields tuples; indexes 0-3 are the rect, index 4 is the text
+            blocks = page.get_text("blocks") or []
+            for b in blocks:
+                if isinstance(b, (list, tuple)) and len(b) >= 5:
+                    text = (b[4] or "").strip()
+                    if text:
+                        yield pno, (b[0], b[1], b[2], b[3]), text
+
+def _from_artifact(art: artifact.Artifact, blocks: bool) -> Iterator:
+    with art:
+        yield from (art.blocks() if blocks else art)
+
+def iter_pdf_blocks(path: str) -> Iterator[Tuple[int, Rect, str]]:
     """
-    Return a list of paragraph-like strings from a PDF or DOCX.
-    Keeps memory modest by iterating pages/paragraphs.
+    Yield (page number, block rect, text) for every non-empty text block,
+    from the upload's paragraph artifact when there is one, else from the PDF
+    one page at a time, so only the current page is held in memory.
+    """
+    art = artifact.load(path)
+    if art is not None and art.has_blocks:
+        return timed_iter("extraction", _from_artifact(art, blocks=True))
+    if art is not None:
+        art.close()
+    return timed_iter("extraction", _pdf_blocks(path))
+
+def iter_paragraphs(path: str) -> Iterator[str]:
+    """
+    Yield paragraph-like strings from the upload's paragraph artifact, or,
+    before it exists, from the PDF (page by page) or DOCX (paragraph by
+    paragraph) as they are read.
+    """
+    art = artifact.load(path)
+    if art is not None:
+        return timed_iter("extraction", _from_artifact(art, blocks=False))
+    return timed_iter("extraction", _paragraphs(path))
+
+def _digested_from_artifact(art: artifact.Artifact) -> Iterator[Tuple[str, Optional[str]]]:
+    with art:
+        yield from ((art.text(i), art.digest(i)) for i in range(len(art)))
+
+def iter_digested_paragraphs(path: str) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    Like iter_paragraphs, as (text, sha256) pairs: the digest stored in the
+    upload's artifact, or None before it exists (callers then hash the text).
+    """
+    art = artifact.load(path)
+    if art is not None:
+        return timed_iter("extraction", _digested_from_artifact(art))
+    return timed_iter("extraction", ((text, None) for text in _paragraphs(path)))
+
+def build_artifact(path: str) -> Optional[str]:
+    """
+    Extract `path` once and store the paragraph artifact next to it (run in the
+    background after upload). Returns the artifact path, or None if extraction
+    failed; readers then fall back to the original, which reports the error.
     """
+    existing = artifact.load(path)
+    if existing is not None:   # e.g. a de-duplicated re-upload
+        existing.close()
+        return artifact.artifact_path(path)
+    try:
+        if os.path.splitext(path)[1].lower() == ".pdf":
+            return artifact.write(path, _pdf_blocks(path), has_blocks=True)
+        return artifact.write(path, ((-1, (0.0, 0.0, 0.0, 0.0), t) for t in _paragraphs(path)), has_blocks=False)
+    except Exception:
+        logger.warning("Could not build the paragraph artifact for %s", path, exc_info=True)
+        return None
+
+def _paragraphs(path: str) -> Iterator[str]:
     ext = os.path.splitext(path)[1].lower()
 
     if ext == ".pdf":
-        paras: list[str] = []
-        with fitz.open(path) as doc:
-            for page in doc:
-                # 'blocks' yields tuples; index 4 is the text
-                blocks = page.get_text("blocks") or []
-                for b in blocks:
-                    if isinstance(b, (list, tuple)) and len(b) >= 5:
-                        text = (b[4] or "").strip()
-                        if text:
-                            paras.append(text)
-        return paras
+        for _, _, text in _pdf_blocks(path):
+            yield text
+        return
 
     if ext == ".docx":
+        import docx  # python-docx
         d = docx.Document(path)
-        return [p.text.strip() for p in d.paragraphs if p.text and p.text.strip()]
+        for p in d.paragraphs:
+            text = p.text
+            if text and text.strip():
+                yield text.strip()
+        return
 
     raise ValueError(f"Unsupported extension: {ext}")
+
+def extract_text(path: str) -> list[str]:
+    """
+    Return a list of paragraph-like strings from a PDF or DOCX.
+    Prefer iter_paragraphs() where the whole list is not needed at once.
+    """
+    return list(iter_paragraphs(path))
@@ -0,0 +1,99 @@
+"""
+Concurrent LanguageTool checking.
+Paragraphs are packed into chunks of up to LT_CHUNK_CHARS, the chunks are
+checked on a bounded thread pool against the shared LanguageTool server, and
+each match offset is mapped back to the paragraph it falls in. Matches of
+text-level rules, which would see the other paragraphs of the chunk, are
+dropped (see LT_TEXT_LEVEL_RULES).
+"""
+from __future__ import annotations
+import threading
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+from app.core import config
+from app.services.metrics import stage
+from app.services.models import LT
+
+_SEP = "\n\n"  # LanguageTool treats a blank line as a paragraph break
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+def _pool() -> ThreadPoolExecutor:
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = ThreadPoolExecutor(max_workers=config.LT_WORKERS, thread_name_prefix="lt-check")
+    return _POOL
+
+def _chunks(paragraphs: List[str]) -> List[List[int]]:
+    chunks: List[List[int]] = []
+    current: List[int] = []
+    size = 0
+    for pi, p in enumerate(paragraphs):
+        if current and size + len(_SEP) + len(p) > config.LT_CHUNK_CHARS:
+            chunks.append(current)
+            current, size = [], 0
+        size += (len(_SEP) if current else 0) + len(p)
+        current.append(pi)
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _check_chunk(paragraphs: List[str], indices: List[int]) -> List[Tuple[int, int, Any]]:
+    starts: List[int] = []
+    pos = 0
+    for pi in indices:
+        starts.append(pos)
+        pos += len(paragraphs[pi]) + len(_SEP)
+    text = _SEP.join(paragraphs[pi] for pi in indices)
+
+    found: List[Tuple[int, int, Any]] = []
+    for m in LT().check(text):
+        if m.ruleId in config.LT_TEXT_LEVEL_RULES:
+            continue  # its context is the chunk, not the paragraph
+        k = bisect_right(starts, m.offset) - 1
+        pi = indices[k]
+        offset = m.offset - starts[k]
+        if offset + m.errorLength > len(paragraphs[pi]):
+            continue  # match spans the separator between two paragraphs
+        found.append((pi, offset, m))
+    return found
+
+def check_paragraphs(paragraphs: List[str]) -> List[List[Tuple[int, Any]]]:
+    """
+    LanguageTool matches for every paragraph, as (paragraph-relative offset, match)
+    pairs in document order. Use the offset, not match.offset, which is chunk-relative.
+    """
+    results: List[List[Tuple[int, Any]]] = [[] for _ in paragraphs]
+    chunks = _chunks(paragraphs)
+    if not chunks:
+        return results
+    LT()  # start the server once, before any worker thread needs it
+    with stage("languagetool"):
+        if len(chunks) == 1 or config.LT_WORKERS <= 1:
+            checked = [_check_chunk(paragraphs, c) for c in chunks]
+        else:
+            checked = list(_pool().map(lambda c: _check_chunk(paragraphs, c), chunks))
+    for found in checked:
+        for pi, offset, m in found:
+            results[pi].append((offset, m))
+    return results
+
+def lt_issues(paragraphs: List[str]) -> List[Dict]:
+    issues: List[Dict] = []
+    # chunked + concurrent; offsets come back paragraph-relative
+    for pi, matches in enumerate(check_paragraphs(paragraphs)):
+        for offset, m in matches:
+            suggestion = ", ".join(m.replacements[:3]) if m.replacements else None
+            issues.append({
+                "category": "grammar",
+                "severity": "high" if m.ruleIssueType in ("misspelling", "typographical") else "medium",
+                "message": m.message,
+                "rule": m.ruleId,
+                "location": {"paragraph": pi, "start": offset, "end": offset + m.errorLength},
+                "suggestion": suggestion,
+                "replacements": list(m.replacements),  # kept for /revise, not part of Issue
+            })
+    return issues
@@ -0,0 +1,123 @@
+"""
+In-process background jobs for long-running /analyze and /revise calls.
+Work runs on a thread or process pool; a job's status is read from its
+future, so it is accurate for both executor kinds. A job submitted for a
+client holds its size-weighted admission units until it finishes.
+"""
+from __future__ import annotations
+import threading, time, uuid
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from fastapi import HTTPException
+from app.core.config import ADMISSION_RETRY_AFTER, JOB_EXECUTOR, JOB_WORKERS, JOB_MAX_PENDING, JOB_TTL_SECONDS
+from app.services.admission import ADMISSION
+
+class Job:
+    def __init__(self, kind: str, future: Future):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.future = future
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        future.add_done_callback(self._on_done)
+
+    def _on_done(self, _f: Future) -> None:
+        self.finished = time.time()
+
+    @property
+    def status(self) -> str:
+        f = self.future
+        if f.done():
+            return "failed" if f.cancelled() or f.exception() is not None else "done"
+        return "running" if f.running() else "queued"
+
+    @property
+    def error(self) -> Optional[str]:
+        f = self.future
+        if not f.done():
+            return None
+        if f.cancelled():
+            return "cancelled"
+        exc = f.exception()
+        if exc is None:
+            return None
+        return exc.detail if isinstance(exc, HTTPException) else f"{type(exc).__name__}: {exc}"
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created": self.created,
+            "finished": self.finished,
+            "error": self.error,
+        }
+
+class JobQueue:
+    def __init__(self, workers: int = JOB_WORKERS, max_pending: int = JOB_MAX_PENDING,
+                 executor: str = JOB_EXECUTOR):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor_kind = executor
+        self._executor: Optional[Executor] = None
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        return self._executor
+
+    def _prune(self) -> None:
+        cutoff = time.time() - JOB_TTL_SECONDS
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished < cutoff]:
+            del self._jobs[job_id]
+
+    def pending(self) -> int:
+        """Jobs queued or running."""
+        return sum(1 for j in list(self._jobs.values()) if not j.future.done())
+
+    def running(self) -> int:
+        return sum(1 for j in list(self._jobs.values()) if j.status == "running")
+
+    def submit(self, kind: str, fn: Callable, *args: Any,
+               client: Optional[str] = None, nbytes: int = 0) -> Job:
+        """
+        Schedule fn(*args); with the process executor fn and args must be picklable.
+        With a client, the job takes admission units for nbytes of input at
+        submission (429 if over budget) and gives them back when it finishes.
+        """
+        units = 0
+        if client is not None:
+            units = ADMISSION.weight(nbytes)
+            if not ADMISSION.try_acquire(client, units):
+                raise HTTPException(status_code=429, detail="Too many documents in progress, retry later",
+                                    headers={"Retry-After": str(ADMISSION_RETRY_AFTER)})
+        try:
+            with self._lock:
+                self._prune()
+                if self.pending() >= self.max_pending:
+                    raise HTTPException(status_code=429, detail="Job queue is full",
+                                        headers={"Retry-After": "5"})
+                job = Job(kind, self._get_executor().submit(fn, *args))
+                self._jobs[job.id] = job
+        except BaseException:
+            if units:
+                ADMISSION.release(client, units)
+            raise
+        if units:
+            job.future.add_done_callback(lambda _: ADMISSION.release(client, units))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+JOBS = JobQueue()
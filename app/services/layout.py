@@ -0,0 +1,89 @@
+"""
+Text layout for rendered PDFs.
+The font is loaded once per process and word widths are cached per font size,
+so wrapping a paragraph costs one dict lookup per word instead of
+re-measuring the growing line for every word.
+"""
+from __future__ import annotations
+import os
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List
+
+if TYPE_CHECKING:
+    import fitz
+
+_FONT_CANDIDATES = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+    "/Library/Fonts/Arial Unicode.ttf",
+    "/Library/Fonts/Arial.ttf",
+    "/System/Library/Fonts/Supplemental/Arial Unicode.ttf",
+    "/System/Library/Fonts/Supplemental/Arial.ttf",
+]
+_MAX_CACHED_WORDS = 100_000
+
+def pick_fontfile() -> str | None:
+    for p in _FONT_CANDIDATES:
+        if os.path.exists(p):
+            return p
+    return None  # falls back to Base14 Courier (monospace) which avoids overlap
+
+@lru_cache(maxsize=1)
+def load_font() -> fitz.Font:
+    """Prefer a Unicode TTF; else Base14 Courier. Read from disk once per process."""
+    import fitz  # PyMuPDF is only needed once a PDF is rendered
+    ff = pick_fontfile()
+    if ff:
+        try:
+            return fitz.Font(fontfile=ff)
+        except Exception:
+            pass
+    return fitz.Font("cour")
+
+class FontMetrics:
+    """Cached word widths for one font at one size."""
+    def __init__(self, font: fitz.Font, fontsize: float):
+        self.font = font
+        self.fontsize = fontsize
+        self._widths: Dict[str, float] = {}
+        self.space = self.width(" ")
+
+    def width(self, word: str) -> float:
+        w = self._widths.get(word)
+        if w is None:
+            if len(self._widths) >= _MAX_CACHED_WORDS:
+                self._widths.clear()
+            w = self._widths[word] = self.font.text_length(word, fontsize=self.fontsize)
+        return w
+
+    def wrap(self, text: str, max_width: float) -> List[str]:
+        """Greedy wrap on single spaces; a word wider than max_width gets its own line."""
+        if not text:
+            return [""]
+        lines: List[str] = []
+        line: List[str] = []
+        line_w = 0.0
+        for word in text.split(" "):
+            w = self.width(word)
+            if line and line_w + self.space + w > max_width:
+                lines.append(" ".join(line))
+                line, line_w = [], 0.0
+            line_w = line_w + self.space + w if line else w
+            line.append(word)
+        if line:
+            lines.append(" ".join(line))
+        return lines
+
+@lru_cache(maxsize=8)
+def _base14_font(name: str) -> fitz.Font:
+    import fitz
+    return fitz.Font(name)
+
+@lru_cache(maxsize=64)
+def metrics(fontsize: float, base14: str | None = None) -> FontMetrics:
+    """
+    Shared metrics for the process font, or for a Base14 font such as "helv"
+    (no embedding needed, Latin-1 text only).
+    """
+    font = _base14_font(base14) if base14 else load_font()
+    return FontMetrics(font, fontsize)
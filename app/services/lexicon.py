@@ -0,0 +1,115 @@
+"""
+Compiled lexical rules: any number of word lists and phrases matched in a
+single regex pass per paragraph. All terms are merged into one trie-shaped
+alternation, so scan time grows with the text, not with the number of terms.
+"""
+from __future__ import annotations
+import hashlib, json, logging, re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Tokens are runs of letters and apostrophes (as in the original tokenizer):
+# a term only matches whole tokens.
+_BEFORE = r"(?<![A-Za-z'])"
+_AFTER = r"(?![A-Za-z'])"
+
+def _normalize(term: str) -> str:
+    return " ".join(term.lower().split())
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    trie: Dict = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # end-of-term marker
+
+    def build(node: Dict) -> str:
+        branches = [
+            (r"\s+" if ch == " " else re.escape(ch)) + build(child)
+            for ch, child in sorted(node.items()) if ch
+        ]
+        if not branches:
+            return ""
+        alt = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # greedy optional: prefer the longest term, back off if the boundary fails
+        return f"(?:{alt})?" if "" in node else alt
+
+    return build(trie)
+
+class LexRule:
+    def __init__(self, rule: str, message: str, terms, severity: str = "low",
+                 category: str = "style", suggestion: Optional[str] = None):
+        self.rule = rule
+        self.message = message          # may use {term}
+        self.severity = severity
+        self.category = category
+        self.suggestion = suggestion    # may use {term}
+        # terms: a list, or a {term: suggestion} mapping for per-term suggestions
+        self.suggestions = {_normalize(t): s for t, s in terms.items()} if isinstance(terms, dict) else {}
+        self.terms = [_normalize(t) for t in terms if t.strip()]
+
+    def spec(self) -> Dict:
+        return {"rule": self.rule, "message": self.message, "severity": self.severity,
+                "category": self.category, "suggestion": self.suggestion,
+                "terms": sorted(self.terms), "suggestions": self.suggestions}
+
+class Lexicon:
+    def __init__(self, rules: List[LexRule]):
+        self.rules = rules
+        self._by_term: Dict[str, LexRule] = {}
+        for r in rules:
+            for t in r.terms:
+                owner = self._by_term.get(t)
+                if owner is not None and owner is not r:
+                    # later rules win, so a style guide can take over a built-in term
+                    logger.warning("Term '%s' is listed in both %s and %s; using %s", t, owner.rule, r.rule, r.rule)
+                self._by_term[t] = r
+        pattern = _trie_pattern(self._by_term) if self._by_term else r"(?!)"
+        self._regex = re.compile(f"{_BEFORE}(?:{pattern}){_AFTER}", re.IGNORECASE)
+        blob = json.dumps([r.spec() for r in rules], sort_keys=True).encode("utf-8")
+        self.fingerprint = hashlib.sha256(blob).hexdigest()[:16]
+
+    def _term(self, matched: str) -> Optional[str]:
+        term = _normalize(matched)
+        if term in self._by_term:
+            return term
+        # re.IGNORECASE also pairs characters whose lower() differs from the
+        # term's (e.g. 'İ' with 'i', 'ſ' with 's'): ask re which term it was
+        for t in self._by_term:
+            if re.fullmatch(r"\s+".join(map(re.escape, t.split(" "))), matched, re.IGNORECASE):
+                return t
+        return None
+
+    def scan(self, text: str) -> List[Tuple[int, int, str, LexRule]]:
+        """Every hit as (start, end, normalized term, rule), left to right."""
+        hits = []
+        for m in self._regex.finditer(text):
+            term = self._term(m.group())
+            if term is not None:
+                hits.append((m.start(), m.end(), term, self._by_term[term]))
+        return hits
+
+    def issues(self, paragraphs: List[str]) -> List[Dict]:
+        issues: List[Dict] = []
+        for pi, p in enumerate(paragraphs):
+            for start, end, term, r in self.scan(p):
+                suggestion = r.suggestions.get(term) or r.suggestion
+                issues.append({
+                    "category": r.category,
+                    "severity": r.severity,
+                    "message": r.message.format(term=term),
+                    "rule": r.rule,
+                    "location": {"paragraph": pi, "start": start, "end": end},
+                    "suggestion": suggestion.format(term=term) if suggestion else None,
+                })
+        return issues
+
+def load_rules(path: str) -> List[LexRule]:
+    """
+    Read a style guide: a JSON list of
+    {"rule", "message", "terms": [...] or {term: suggestion}, "severity"?, "category"?, "suggestion"?}.
+    """
+    with open(path, encoding="utf-8") as f:
+        return [LexRule(**spec) for spec in json.load(f)]
@@ -0,0 +1,172 @@
+"""
+In-process Prometheus-style metrics.
+Histograms are fixed-bucket and guarded by one lock; gauges are computed at
+scrape time from the services that own the numbers, so nothing here needs an
+external collector and the hot paths only pay for a bisect and an add.
+"""
+from __future__ import annotations
+import os, threading, time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from app.core import config
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Iterable[float] = config.METRICS_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = sorted(buckets)
+        self._series: Dict[Labels, List] = {}   # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][i] += 1
+            s[1] += value
+            s[2] += 1
+
+    def snapshot(self) -> Dict[Labels, Dict]:
+        with self._lock:
+            return {k: {"counts": list(s[0]), "sum": s[1], "count": s[2]} for k, s in self._series.items()}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, s in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + [float("inf")], s["counts"]):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(key + (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(key)} {s['sum']:.6f}")
+            lines.append(f"{self.name}_count{_labels(key)} {s['count']}")
+        return lines
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(key: Labels) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}" if key else ""
+
+REQUESTS = Histogram("grammar_http_request_duration_seconds", "HTTP request latency by route template.")
+STAGES = Histogram("grammar_stage_duration_seconds", "Pipeline stage latency (extraction, languagetool, spacy, readability, rendering).")
+_IN_FLIGHT = [0]
+_IN_FLIGHT_LOCK = threading.Lock()
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block (or, used as a decorator, a call) into the stage histogram."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGES.observe(time.perf_counter() - started, stage=name)
+
+def timed_iter(name: str, items: Iterable) -> Iterator:
+    """Yield from items, recording the time spent producing them as one observation."""
+    elapsed = 0.0
+    it = iter(items)
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - started
+            yield item
+    finally:
+        STAGES.observe(elapsed, stage=name)
+
+def request_started() -> None:
+    with _IN_FLIGHT_LOCK:
+        _IN_FLIGHT[0] += 1
+
+def request_finished(method: str, route: str, status: int, seconds: float) -> None:
+    with _IN_FLIGHT_LOCK:
+        _IN_FLIGHT[0] -= 1
+    REQUESTS.observe(seconds, method=method, route=route, status=str(status))
+
+_DISK = {"at": 0.0, "bytes": 0}
+_DISK_LOCK = threading.Lock()
+
+def _dir_bytes(root: str) -> int:
+    total = 0
+    stack = [root]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for e in entries:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        stack.append(e.path)
+                    elif e.is_file(follow_symlinks=False):
+                        total += e.stat(follow_symlinks=False).st_size
+                except OSError:
+                    pass
+    return total
+
+def data_dir_bytes() -> int:
+    # walking a large DATA_DIR on every scrape is wasteful; reuse a recent total
+    with _DISK_LOCK:
+        now = time.monotonic()
+        if now - _DISK["at"] >= config.METRICS_DISK_TTL_SECONDS or not _DISK["at"]:
+            _DISK["bytes"] = _dir_bytes(config.DATA_DIR)
+            _DISK["at"] = now
+        return _DISK["bytes"]
+
+def _gauge(name: str, help: str, samples: Iterable[Tuple[Labels, Optional[float]]], kind: str = "gauge") -> List[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    lines += [f"{name}{_labels(key)} {value}" for key, value in samples if value is not None]
+    return lines
+
+def render() -> str:
+    """The whole registry in the Prometheus text exposition format."""
+    # imported here: these modules import metrics for their stage timers
+    from app.services import models, pipeline
+    from app.services.admission import ADMISSION
+    from app.services.cache import PARAGRAPHS, REPORTS, TEXT_PARAGRAPHS
+    from app.services.jobs import JOBS
+
+    pending, running = JOBS.pending(), JOBS.running()
+    model_stats = models.stats()
+    caches = {"reports": REPORTS.stats(), "paragraphs": PARAGRAPHS.stats(),
+              "text_paragraphs": TEXT_PARAGRAPHS.stats()}
+    rules = pipeline.stats()
+    admission = ADMISSION.stats()
+
+    lines = REQUESTS.render() + STAGES.render()
+    lines += _gauge("grammar_http_requests_in_flight", "Requests currently being served.", [((), _IN_FLIGHT[0])])
+    lines += _gauge("grammar_jobs_queued", "Background jobs waiting for a worker.", [((), pending - running)])
+    lines += _gauge("grammar_jobs_in_flight", "Background jobs currently running.", [((), running)])
+    lines += _gauge("grammar_admission_units_in_flight", "Size-weighted units held by admitted heavy requests.",
+                    [((), admission["in_flight_units"])])
+    lines += _gauge("grammar_admission_rejected_total", "Heavy requests turned away with 429.",
+                    [((), admission["rejected"])], kind="counter")
+    lines += _gauge("grammar_model_load_seconds", "Time taken to load each model.",
+                    [((("model", m),), s.get("load_seconds")) for m, s in model_stats.items() if m != "process"])
+    lines += _gauge("grammar_process_rss_bytes", "Resident memory of this worker.",
+                    [((), model_stats["process"]["rss_bytes"])])
+    lines += _gauge("grammar_cache_hit_ratio", "Hit rate of each cache since start.",
+                    [((("cache", c),), s["hit_rate"]) for c, s in caches.items()])
+    lines += _gauge("grammar_cache_bytes", "Bytes held by each cache.",
+                    [((("cache", c),), s["bytes"]) for c, s in caches.items()])
+    lines += _gauge("grammar_data_dir_bytes", "Disk used under DATA_DIR (uploads, outputs, caches).",
+                    [((), data_dir_bytes())])
+    lines += _gauge("grammar_rule_calls_total", "Rule invocations.",
+                    [((("rule", r),), s["calls"]) for r, s in rules.items()], kind="counter")
+    lines += _gauge("grammar_rule_seconds_total", "Wall time spent in each rule.",
+                    [((("rule", r),), s["seconds"]) for r, s in rules.items()], kind="counter")
+    lines += _gauge("grammar_rule_issues_total", "Issues reported by each rule.",
+                    [((("rule", r),), s["issues"]) for r, s in rules.items()], kind="counter")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,87 @@
+"""
+Process-wide registry for the heavyweight models: the JVM-backed LanguageTool
+server and the spaCy pipeline. Every service module goes through LT()/nlp(),
+so a worker holds exactly one instance of each no matter which routes it serves.
+"""
+from __future__ import annotations
+import os, threading, time
+from typing import Dict, Optional
+from app.core.config import LT_LANGUAGE, SPACY_MODEL, SPACY_DISABLE
+
+_LT = None
+_NLP = None
+_LT_LOCK = threading.Lock()
+_NLP_LOCK = threading.Lock()
+_STATS: Dict[str, Dict] = {}
+
+def LanguageTool(*args, **kwargs):
+    # language_tool_python and spacy are imported on first load, not with the app
+    from language_tool_python import LanguageTool as _LanguageTool
+    return _LanguageTool(*args, **kwargs)
+
+def _rss_bytes(pid: int | str = "self") -> Optional[int]:
+    # resident set size from procfs; None where /proc is unavailable
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _record(name: str, started: float, rss_before: Optional[int]) -> None:
+    rss_after = _rss_bytes()
+    _STATS[name] = {
+        "load_seconds": round(time.perf_counter() - started, 3),
+        "rss_delta_bytes": rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+        "loaded_at": time.time(),
+    }
+
+def LT():
+    global _LT
+    if _LT is None:
+        with _LT_LOCK:
+            if _LT is None:
+                started, rss = time.perf_counter(), _rss_bytes()
+                _LT = LanguageTool(LT_LANGUAGE)
+                _record("language_tool", started, rss)
+    return _LT
+
+def nlp():
+    global _NLP
+    if _NLP is None:
+        with _NLP_LOCK:
+            if _NLP is None:
+                import spacy
+                started, rss = time.perf_counter(), _rss_bytes()
+                _NLP = spacy.load(SPACY_MODEL, disable=SPACY_DISABLE)
+                _record("spacy", started, rss)
+    return _NLP
+
+def preload() -> Dict[str, Dict]:
+    """Eagerly load every model (e.g. at worker startup) and return stats()."""
+    LT()
+    nlp()
+    return stats()
+
+def stats() -> Dict[str, Dict]:
+    """Load time and memory figures for the models loaded in this process."""
+    out: Dict[str, Dict] = {name: dict(s) for name, s in _STATS.items()}
+    if "language_tool" in out and _LT is not None:
+        # the LanguageTool server is a child JVM, so report its own RSS
+        server = getattr(_LT, "_server", None)
+        out["language_tool"]["server_rss_bytes"] = _rss_bytes(server.pid) if server is not None else None
+    out["process"] = {"rss_bytes": _rss_bytes()}
+    return out
+
+def shutdown() -> None:
+    """Stop the LanguageTool server and drop the spaCy pipeline."""
+    global _LT, _NLP
+    with _LT_LOCK:
+        if _LT is not None:
+            try:
+                _LT.close()
+            finally:
+                _LT = None
+                _STATS.pop("language_tool", None)
+    with _NLP_LOCK:
+        _NLP = None
+        _STATS.pop("spacy", None)
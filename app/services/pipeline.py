@@ -0,0 +1,72 @@
+"""
+Rule registry for the analysis pipeline.
+Each rule declares its category and what it needs ("text", "doc" or "sents"),
+can be enabled or disabled per request, and is timed on every call. Registration
+order is report order.
+"""
+from __future__ import annotations
+import threading, time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from fastapi import HTTPException
+from app.services import rules as R
+from app.services.grammar import lt_issues
+
+class Rule:
+    def __init__(self, name: str, category: str, needs: str, fn: Callable, pooled: bool):
+        self.name = name
+        self.category = category
+        self.needs = needs        # "text": fn(paragraphs); "doc"/"sents": fn(AnalysisContext)
+        self.fn = fn
+        self.pooled = pooled      # CPU-bound: may run in the engine's process pool
+
+RULES: Dict[str, Rule] = {}
+
+def register(name: str, category: str, needs: str = "text", pooled: bool = True):
+    def deco(fn: Callable) -> Callable:
+        RULES[name] = Rule(name, category, needs, fn, pooled)
+        return fn
+    return deco
+
+register("grammar", "grammar", needs="text", pooled=False)(lt_issues)  # LanguageTool is its own server
+register("style", "style", needs="text")(R.style_weasel_jargon)
+register("long_sentences", "clarity", needs="sents")(R.clarity_long_sentences)
+register("passive_voice", "clarity", needs="doc")(R.passive_voice_issues)
+
+def select(rules: Optional[Iterable[str]] = None, skip: Optional[Iterable[str]] = None) -> List[str]:
+    """Enabled rule names, in registry order; None means every rule."""
+    wanted = list(RULES) if rules is None else list(rules)
+    skipped = set(skip or ())
+    unknown = (set(wanted) | skipped) - set(RULES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown rules: {', '.join(sorted(unknown))}")
+    return [name for name in RULES if name in wanted and name not in skipped]
+
+def run(ctx: R.AnalysisContext, names: Iterable[str]) -> Tuple[Dict[str, List[Dict]], Dict[str, Dict]]:
+    """Run the named rules over one context; returns ({rule: issues}, {rule: timing})."""
+    found: Dict[str, List[Dict]] = {}
+    timings: Dict[str, Dict] = {}
+    for name in names:
+        rule = RULES[name]
+        started = time.perf_counter()
+        found[name] = rule.fn(ctx.paragraphs if rule.needs == "text" else ctx)
+        timings[name] = {"calls": 1, "seconds": time.perf_counter() - started, "issues": len(found[name])}
+    return found, timings
+
+def merge(into: Dict[str, Dict], timings: Dict[str, Dict]) -> Dict[str, Dict]:
+    for name, t in timings.items():
+        acc = into.setdefault(name, {"calls": 0, "seconds": 0.0, "issues": 0})
+        for key in ("calls", "seconds", "issues"):
+            acc[key] += t[key]
+    return into
+
+# Process-wide totals (rules run in engine workers are merged in by the parent)
+_STATS: Dict[str, Dict] = {}
+_STATS_LOCK = threading.Lock()
+
+def record(timings: Dict[str, Dict]) -> None:
+    with _STATS_LOCK:
+        merge(_STATS, timings)
+
+def stats() -> Dict[str, Dict]:
+    with _STATS_LOCK:
+        return {name: {**t, "seconds": round(t["seconds"], 6)} for name, t in _STATS.items()}
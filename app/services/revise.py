@@ -1,18 +1,30 @@
 from __future__ import annotations
-import os, shutil, re
-from typing import List, Literal
-from language_tool_python import LanguageTool
-import docx
-from app.services.extract import extract_text
-import fitz
-
-# reuse a singleton LT instance to avoid repeated startups
-_LT = None
-def LT():
-    global _LT
-    if _LT is None:
-        _LT = LanguageTool("en-US")  # switch to en-GB if desired
-    return _LT
+import hashlib, json, logging, os, shutil, re, tempfile, threading, zipfile
+from contextlib import contextmanager
+from difflib import SequenceMatcher
+from typing import TYPE_CHECKING, Dict, List, Literal, Optional
+from app.services.analyze import analyzer_fingerprint, cached_grammar
+from app.services.grammar import lt_issues
+from app.services import layout
+from app.services.metrics import stage
+from app.services.extract import extract_text, iter_pdf_blocks
+from app.core.config import (
+    PDF_REVISE_IN_PLACE, DOCX_REVISE_IN_PLACE, CORRECTIONS_FILENAME, RENDER_MANIFEST, DOC_LOCK_FILENAME,
+)
+from app.utils.storage import file_sha256
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: the lock below is per-process there
+    fcntl = None
+
+if TYPE_CHECKING:
+    import fitz
+
+logger = logging.getLogger(__name__)
+
+# Bump when correction logic changes so stored corrected.json files are redone
+REVISE_VERSION = 1
 
 def _simple_fixes(text: str) -> str:
     """
@@ -31,116 +43,362 @@ def _simple_fixes(text: str) -> str:
     lines = [ln.rstrip() for ln in text.splitlines()]
     return "\n".join(lines).strip()
 
+def _apply_replacements(text: str, grammar: List[Dict]) -> str:
+    """
+    Apply the first replacement of each LanguageTool issue, as LT().correct() would.
+    Issues without a replacement, or overlapping an earlier fix, are skipped.
+    """
+    out: List[str] = []
+    pos = 0
+    for issue in sorted(grammar, key=lambda i: i["location"]["start"]):
+        loc = issue["location"]
+        replacements = issue.get("replacements")
+        if not replacements or loc["start"] < pos:
+            continue
+        out.append(text[pos:loc["start"]])
+        out.append(replacements[0])
+        pos = loc["end"]
+    out.append(text[pos:])
+    return "".join(out)
+
 def auto_correct_text(paragraphs: List[str]) -> List[str]:
     """
-    Apply simple fixes + LanguageTool's automatic corrections.
+    Apply LanguageTool's automatic corrections + simple fixes.
+    Matches come from the cached /analyze results where available; only
+    paragraphs never analyzed are sent to LanguageTool.
     """
+    grammar = cached_grammar(paragraphs)
+    missing = [pi for pi, g in enumerate(grammar) if g is None and paragraphs[pi].strip()]
+    if missing:
+        for pi in missing:
+            grammar[pi] = []
+        for issue in lt_issues([paragraphs[pi] for pi in missing]):
+            grammar[missing[issue["location"]["paragraph"]]].append(issue)
+
     fixed: List[str] = []
-    for p in paragraphs:
+    for p, g in zip(paragraphs, grammar):
         if not p.strip():
             fixed.append(p)
             continue
-        base = _simple_fixes(p)
-        corrected = LT().correct(base)  # LT chooses first suggestion per match
-        fixed.append(corrected)
+        # offsets refer to the extracted text, so LT fixes go first
+        fixed.append(_simple_fixes(_apply_replacements(p, g)))
     return fixed
 
+@stage("rendering")
 def write_docx(paragraphs: List[str], out_path: str) -> str:
+    import docx  # python-docx and PyMuPDF are imported where a format is written
     d = docx.Document()
     for p in paragraphs:
         d.add_paragraph(p)
     d.save(out_path)
     return out_path
 
+def _splice(texts: List[str], start: int, end: int, repl: str) -> None:
+    """Replace chars [start, end) of the concatenated run texts, editing only the runs involved."""
+    bounds, pos = [], 0
+    for t in texts:
+        bounds.append((pos, pos + len(t)))
+        pos += len(t)
+    if start == end:
+        # pure insertion: extend the run before the insertion point so it inherits its formatting
+        k = next((k for k, (r0, r1) in enumerate(bounds) if r0 < start <= r1), 0)
+        r0 = bounds[k][0]
+        texts[k] = texts[k][:start - r0] + repl + texts[k][start - r0:]
+        return
+    k0 = next(k for k, (r0, r1) in enumerate(bounds) if r0 <= start < r1)
+    k1 = next(k for k, (r0, r1) in enumerate(bounds) if r0 < end <= r1)
+    r0, _ = bounds[k0]
+    if k0 == k1:
+        texts[k0] = texts[k0][:start - r0] + repl + texts[k0][end - r0:]
+        return
+    texts[k0] = texts[k0][:start - r0] + repl
+    for k in range(k0 + 1, k1):
+        texts[k] = ""
+    texts[k1] = texts[k1][end - bounds[k1][0]:]
+
+def _patch_runs(paragraph, old: str, new: str) -> None:
+    """Turn paragraph text `old` (as extracted, i.e. stripped) into `new` run by run."""
+    runs = paragraph.runs
+    texts = [r.text for r in runs]
+    full = "".join(texts)
+    if not runs or full.strip() != old:
+        # text outside plain runs (hyperlinks, fields): rewrite the paragraph, keeping its style
+        paragraph.text = new
+        return
+    lead = len(full) - len(full.lstrip())
+    ops = SequenceMatcher(None, old, new, autojunk=False).get_opcodes()
+    for tag, i1, i2, j1, j2 in reversed(ops):  # back to front keeps earlier offsets valid
+        if tag != "equal":
+            _splice(texts, lead + i1, lead + i2, new[j1:j2])
+    for r, t in zip(runs, texts):
+        if r.text != t:
+            r.text = t
+
+@stage("rendering")
+def revise_docx_in_place(in_path: str, paragraphs: List[str], corrected: List[str], out_path: str) -> str:
+    """
+    Apply corrections to the original DOCX instead of rebuilding it: only changed
+    paragraphs are touched, at run granularity, so styles and formatting survive.
+    Only word/document.xml is re-serialized; every other part is copied as-is.
+    """
+    changed = [(pi, new) for pi, (old, new) in enumerate(zip(paragraphs, corrected)) if old != new]
+    if not changed:
+        shutil.copy2(in_path, out_path)
+        return out_path
+
+    import docx
+    d = docx.Document(in_path)
+    # same filter as extraction, so indices line up with `paragraphs`
+    targets = [p for p in d.paragraphs if p.text and p.text.strip()]
+    for pi, new in changed:
+        _patch_runs(targets[pi], paragraphs[pi], new)
+
+    partname = d.part.partname.lstrip("/")
+    blob = d.part.blob
+    with zipfile.ZipFile(in_path) as src, zipfile.ZipFile(out_path, "w", zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            dst.writestr(info, blob if info.filename == partname else src.read(info))
+    return out_path
+
+@stage("rendering")
 def write_txt(paragraphs: List[str], out_path: str) -> str:
     with open(out_path, "w", encoding="utf-8") as f:
         f.write("\n\n".join(paragraphs) + "\n")
     return out_path
 
-def revise_document(in_path: str, out_dir: str, fmt: Literal["docx", "txt", "pdf"]="docx") -> str:
+def _write_json(path: str, data: Dict) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+def _read_json(path: str) -> Optional[Dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+_LOCKS: Dict[str, list] = {}   # folder -> [lock, threads holding or waiting for it]
+_LOCKS_GUARD = threading.Lock()
+
+@contextmanager
+def _doc_lock(out_dir: str):
     """
-    Extract → fix → write corrected output in requested format (docx/txt/pdf).
-    If input is PDF and the corrected text equals the original, copy the original PDF.
+    One writer per document folder for corrected.json and the render manifest:
+    a lock per folder for this process's threads, and an flock on
+    DOC_LOCK_FILENAME for the other worker processes. A folder's lock is
+    dropped once nobody holds or waits for it, so _LOCKS stays small.
     """
-    paragraphs = extract_text(in_path)
-    # if extraction produced nothing, just copy original for PDF requests
-    ext = os.path.splitext(in_path)[1].lower()
-    os.makedirs(out_dir, exist_ok=True)
+    key = os.path.abspath(out_dir)
+    with _LOCKS_GUARD:
+        entry = _LOCKS.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(out_dir, DOC_LOCK_FILENAME), "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)   # released when f is closed
+                yield
+    finally:
+        with _LOCKS_GUARD:
+            entry[1] -= 1
+            if not entry[1]:
+                del _LOCKS[key]
 
-    if not any(p.strip() for p in paragraphs):
-        if fmt == "pdf" and ext == ".pdf":
-            out_path = os.path.join(out_dir, "corrected.pdf")
-            shutil.copy2(in_path, out_path)
-            return out_path
-        # produce an empty-but-valid docx/txt
-        corrected: list[str] = []
-    else:
-        corrected = auto_correct_text(paragraphs)
+def _source(in_path: str) -> str:
+    # what corrected.json was computed from
+    return f"{file_sha256(in_path)}-{analyzer_fingerprint()}-{REVISE_VERSION}"
+
+def correct_document(in_path: str, out_dir: str) -> Dict:
+    """
+    Extract → fix, once: the original and corrected paragraph lists are stored in
+    out_dir/corrected.json and reused while the original and the analyzer
+    settings are unchanged. "hash" identifies the corrections for the render cache;
+    it is also copied, with "source", into the render manifest (see rendered_output).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, CORRECTIONS_FILENAME)
+    source = _source(in_path)
+    with _doc_lock(out_dir):
+        saved = _read_json(path)
+        if saved is None or saved.get("source") != source:
+            paragraphs = extract_text(in_path)
+            corrected = auto_correct_text(paragraphs) if any(p.strip() for p in paragraphs) else []
+            blob = json.dumps(corrected, ensure_ascii=False).encode("utf-8")
+            saved = {
+                "source": source,
+                "hash": hashlib.sha256(blob).hexdigest(),
+                "paragraphs": paragraphs,
+                "corrected": corrected,
+            }
+            _write_json(path, saved)
+        manifest_path = os.path.join(out_dir, RENDER_MANIFEST)
+        manifest = _read_json(manifest_path) or {}
+        summary = {"source": saved["source"], "hash": saved["hash"]}
+        if manifest.get("corrections") != summary:
+            manifest["corrections"] = summary
+            _write_json(manifest_path, manifest)
+    return saved
 
-    original_text = "\n\n".join(paragraphs)
-    corrected_text = "\n\n".join(corrected)
+def _render(in_path: str, corrections: Dict, out_path: str, fmt: str) -> str:
+    ext = os.path.splitext(in_path)[1].lower()
+    paragraphs, corrected = corrections["paragraphs"], corrections["corrected"]
 
-    # If the doc is a PDF and there are no textual changes, copy original to preserve layout
-    if fmt == "pdf" and ext == ".pdf" and corrected_text == original_text:
-        out_path = os.path.join(out_dir, "corrected.pdf")
+    # If the doc is a PDF and there are no textual changes (or no text at all),
+    # copy the original to preserve layout
+    if fmt == "pdf" and ext == ".pdf" and (not corrected or corrected == paragraphs):
         shutil.copy2(in_path, out_path)
         return out_path
-
-    # Otherwise render in requested format
     if fmt == "txt":
-        out_path = os.path.join(out_dir, "corrected.txt")
         return write_txt(corrected, out_path)
     if fmt == "pdf":
-        out_path = os.path.join(out_dir, "corrected.pdf")
+        if ext == ".pdf" and PDF_REVISE_IN_PLACE:
+            # block coordinates come from the upload artifact, no re-extraction
+            blocks = list(iter_pdf_blocks(in_path))
+            if [text for _, _, text in blocks] == paragraphs:
+                try:
+                    return revise_pdf_in_place(in_path, blocks, corrected, out_path)
+                except Exception:
+                    # e.g. encrypted or malformed input: fall back to re-typesetting
+                    logger.warning("In-place PDF revision of %s failed; re-typesetting", in_path, exc_info=True)
         return write_pdf(corrected, out_path)
-
-    out_path = os.path.join(out_dir, "corrected.docx")
+    if ext == ".docx" and DOCX_REVISE_IN_PLACE and corrected:
+        return revise_docx_in_place(in_path, paragraphs, corrected, out_path)
     return write_docx(corrected, out_path)
 
-def _measure_width(page: fitz.Page, text: str, fontname: str, fontsize: float) -> float:
-    """
-    Cross-version width measurement:
-    - Prefer Page.get_text_length (older / many builds)
-    - Fallback to module-level fitz.get_text_length (other builds)
-    - Last-resort heuristic if neither exists
-    """
-    # 1) Page.get_text_length(...)
-    if hasattr(page, "get_text_length"):
-        return page.get_text_length(text, fontname=fontname, fontsize=fontsize)
-
-    # 2) Module-level fitz.get_text_length(...)
-    if hasattr(fitz, "get_text_length"):
-        try:
-            return fitz.get_text_length(text, fontname=fontname, fontsize=fontsize)
-        except TypeError:
-            # some signatures are (text, fontsize, fontname)
-            return fitz.get_text_length(text, fontsize, fontname)
-
-    # 3) Heuristic fallback (approx)
-    return len(text) * fontsize * 0.5
-
-def _pick_fontfile() -> str | None:
-    for p in [
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-        "/Library/Fonts/Arial Unicode.ttf",
-        "/Library/Fonts/Arial.ttf",
-        "/System/Library/Fonts/Supplemental/Arial Unicode.ttf",
-        "/System/Library/Fonts/Supplemental/Arial.ttf",
-    ]:
-        if os.path.exists(p): return p
-    return None  # falls back to Base14 Courier (monospace) which avoids overlap
-
-def _ensure_font(doc: fitz.Document) -> str:
-    # Prefer a Unicode TTF; else use a Base14 **monospace** (Courier) to avoid metric surprises
-    fontname = "Courier"  # safer than proportional when metrics APIs vary
-    ff = _pick_fontfile()
-    if ff:
-        try:
-            fontname = doc.insert_font(fontfile=ff)
-        except Exception:
-            fontname = "Courier"
-    return fontname
+def rendered_output(in_path: str, out_dir: str, fmt: Literal["docx", "txt", "pdf"]) -> Optional[str]:
+    """
+    out_dir/corrected.<fmt> when it is current, i.e. render_output would do no
+    work; else None. Reads only the small render manifest, not corrected.json.
+    """
+    manifest = _read_json(os.path.join(out_dir, RENDER_MANIFEST)) or {}
+    corrections = manifest.get("corrections") or {}
+    if corrections.get("source") != _source(in_path):
+        return None
+    out_path = os.path.join(out_dir, f"corrected.{fmt}")
+    if manifest.get(fmt) == corrections["hash"] and os.path.isfile(out_path):
+        return out_path
+    return None
+
+def render_output(in_path: str, out_dir: str, fmt: Literal["docx", "txt", "pdf"]) -> str:
+    """
+    out_dir/corrected.<fmt>, rendered on first request and then served from the
+    render manifest until the corrections change (their hash is recorded per format).
+    """
+    corrections = correct_document(in_path, out_dir)
+    out_path = os.path.join(out_dir, f"corrected.{fmt}")
+    manifest_path = os.path.join(out_dir, RENDER_MANIFEST)
+    with _doc_lock(out_dir):
+        manifest = _read_json(manifest_path) or {}
+        if manifest.get(fmt) == corrections["hash"] and os.path.isfile(out_path):
+            return out_path
+        _render(in_path, corrections, out_path, fmt)
+        manifest[fmt] = corrections["hash"]
+        _write_json(manifest_path, manifest)
+    return out_path
+
+def revise_document(in_path: str, out_dir: str, fmt: Literal["docx", "txt", "pdf"]="docx") -> str:
+    """
+    Extract → fix → write corrected output in requested format (docx/txt/pdf).
+    If input is PDF and the corrected text equals the original, copy the original PDF;
+    if only some blocks changed, patch those blocks on the original pages.
+    Corrections and rendered formats are cached (see correct_document/render_output).
+    """
+    return render_output(in_path, out_dir, fmt)
+
+def _needs_ttf(text: str) -> bool:
+    # Base14 Helvetica covers Latin-1 only; anything else needs the Unicode TTF
+    try:
+        text.encode("latin-1")
+        return False
+    except UnicodeEncodeError:
+        return True
+
+def _fit_block(page: fitz.Page, rect: fitz.Rect, text: str, original: str) -> None:
+    """Typeset `text` into `rect`, shrinking the font until the wrapped lines fit."""
+    text = re.sub(r"\s+", " ", text).strip()
+    base14 = None if _needs_ttf(text) else "helv"   # Base14: nothing to embed
+    n_lines = original.count("\n") + 1
+    fontsize = max(4.0, min(12.0, rect.height / n_lines / 1.2))
+    while True:
+        metrics = layout.metrics(fontsize, base14)
+        lines = metrics.wrap(text, rect.width)
+        if len(lines) * fontsize * 1.2 <= rect.height + fontsize * 0.3 or fontsize <= 4.0:
+            break
+        fontsize -= 0.5
+
+    fontname = "helv"
+    if base14 is None:
+        fontname = "GACfont"
+        page.insert_font(fontname=fontname, fontbuffer=metrics.font.buffer)
+    y = rect.y0 + fontsize
+    for line in lines:
+        page.insert_text((rect.x0, y), line, fontname=fontname, fontsize=fontsize)
+        y += fontsize * 1.2
+
+def _stamp(page: fitz.Page, overlay: fitz.Document) -> None:
+    """
+    Draw the overlay's single page over `page` as a form XObject. Subsetting
+    the scratch overlay embeds only the glyphs it uses, and leaves the fonts
+    already embedded in the original alone.
+    """
+    _subset_fonts(overlay)
+    page.show_pdf_page(page.rect, overlay, 0)
+
+@stage("rendering")
+def revise_pdf_in_place(in_path: str, blocks: list, corrected: List[str], out_path: str) -> str:
+    """
+    Patch only the changed text blocks of the original PDF: redact each changed
+    block and typeset its corrected text in the same rect. The result is an
+    incremental update of a copy of the original, so untouched pages and
+    objects are carried over byte for byte and the cost scales with the edits.
+
+    A changed block is re-set whole, in Helvetica (or the Unicode TTF), rather
+    than patched span by span: a correction can change the text's length, and
+    re-wrapping the block is what keeps it inside its rect. Blocks needing the
+    TTF are drawn on a scratch page that is subset and stamped over the page.
+    """
+    import fitz
+    changes: Dict[int, list] = {}
+    for (pno, rect, text), new in zip(blocks, corrected):
+        if new != text:
+            changes.setdefault(pno, []).append((fitz.Rect(rect), text, new))
+
+    shutil.copy2(in_path, out_path)
+    if not changes:
+        return out_path
+
+    redact_opts = {"images": fitz.PDF_REDACT_IMAGE_NONE}
+    if hasattr(fitz, "PDF_REDACT_LINE_ART_NONE"):
+        redact_opts["graphics"] = fitz.PDF_REDACT_LINE_ART_NONE  # keep table rules, fills, ...
+    try:
+        with fitz.open(out_path) as doc:
+            for pno, edits in changes.items():
+                page = doc[pno]
+                for rect, _, _ in edits:
+                    page.add_redact_annot(rect, fill=False)
+                page.apply_redactions(**redact_opts)
+                overlay = None
+                for rect, text, new in edits:
+                    target = page
+                    if _needs_ttf(new):
+                        if overlay is None:
+                            overlay = fitz.open()
+                            overlay.new_page(width=page.rect.width, height=page.rect.height)
+                        target = overlay[0]
+                    _fit_block(target, rect, new, text)
+                if overlay is not None:
+                    _stamp(page, overlay)
+                    overlay.close()
+            # deflate compresses only the objects written by this update
+            doc.save(out_path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP, deflate=True)
+    except Exception:
+        os.remove(out_path)
+        raise
+    return out_path
 
 def _sanitize_paragraphs(paragraphs: list[str]) -> list[str]:
     out = []
@@ -154,52 +412,49 @@ def _sanitize_paragraphs(paragraphs: list[str]) -> list[str]:
         out.append(p)
     return out
 
+def _subset_fonts(doc: fitz.Document) -> None:
+    # keep only the glyphs actually used; older PyMuPDF builds need fontTools for this
+    try:
+        doc.subset_fonts()
+    except Exception:
+        logger.warning("Font subsetting failed; embedding full fonts", exc_info=True)
+
+@stage("rendering")
 def write_pdf(paragraphs: list[str], out_path: str) -> str:
+    import fitz
     doc = fitz.open()
     page_rect = fitz.paper_rect("a4")              # can change to "letter"
     margin = 72                                     # 1 inch margin for safety
     max_w = page_rect.width - 2 * margin
-    max_h = page_rect.height - 2 * margin
 
     # Use sanitized text so hidden line-breaks can’t cause same-line redraws
     paragraphs = _sanitize_paragraphs(paragraphs)
     full_text = "\n\n".join(paragraphs).strip()
 
     page = doc.new_page(width=page_rect.width, height=page_rect.height)
-    fontname = _ensure_font(doc)
     fontsize = 12.0                                  # slightly larger → clearer
     leading = fontsize * 1.6                         # generous line height (prevents overlap)
+    metrics = layout.metrics(fontsize)               # process-wide font + word-width cache
 
     if not full_text:
         doc.save(out_path); doc.close(); return out_path
 
-    # Greedy wrap with cross-version width measurement (_measure_width)
-    def wrap_para(p: str) -> list[str]:
-        if not p: return [""]
-        words = p.split(" ")
-        lines, line = [], ""
-        for w in words:
-            cand = (line + " " + w).strip() if line else w
-            width = _measure_width(page, cand, fontname, fontsize)
-            if width <= max_w:
-                line = cand
-            else:
-                if line: lines.append(line)
-                line = w
-        if line: lines.append(line)
-        return lines
-
+    # One TextWriter per page: the font is embedded once per document, not per line
+    writer = fitz.TextWriter(page_rect)
     x, y = margin, margin
     drew_anything = False
 
     for para in full_text.split("\n\n"):
-        for line in wrap_para(para):
+        for line in metrics.wrap(para, max_w):
             # If next baseline would exceed page bottom → new page
             if y + leading > page_rect.height - margin:
+                writer.write_text(page)
                 page = doc.new_page(width=page_rect.width, height=page_rect.height)
+                writer = fitz.TextWriter(page_rect)
                 y = margin
-            # Draw once per line; baseline strictly increases → no overlap possible
-            page.insert_text((x, y), line, fontname=fontname, fontsize=fontsize, render_mode=0)
+            # Baseline strictly increases → no overlap possible
+            if line:
+                writer.append((x, y), line, font=metrics.font, fontsize=fontsize)
             y += leading
             drew_anything = True
         # extra breathing room between paragraphs
@@ -207,8 +462,10 @@ def write_pdf(paragraphs: list[str], out_path: str) -> str:
 
     # Ensure non-empty PDF even if everything trimmed
     if not drew_anything:
-        page.insert_text((margin, margin), " ", fontname=fontname, fontsize=fontsize)
+        writer.append((margin, margin), " ", font=metrics.font, fontsize=fontsize)
+    writer.write_text(page)
 
-    doc.save(out_path)
+    _subset_fonts(doc)
+    doc.save(out_path, garbage=3, deflate=True)
     doc.close()
     return out_path
@@ -1,25 +1,44 @@
 from __future__ import annotations
 from typing import List, Dict
-import textstat
-import re
-import spacy
-from app.core.config import LONG_SENTENCE_THRESHOLD
-
-# load spaCy once
-_nlp = None
-def nlp():
-    global _nlp
-    if _nlp is None:
-        _nlp = spacy.load("en_core_web_sm", disable=["ner"])
-    return _nlp
+import math, re
+from functools import lru_cache
+from app.core import config
+from app.core.config import LONG_SENTENCE_THRESHOLD, SPACY_BATCH_SIZE, SPACY_N_PROCESS
+from app.services.lexicon import LexRule, Lexicon, load_rules
+from app.services.metrics import stage
+from app.services.models import nlp
 
 WEASEL = {"very", "really", "quite", "basically", "actually", "clearly", "obviously"}
 JARGON = {"utilize", "leverage", "synergy", "paradigm"}
 
-def sent_tokens(paragraphs: List[str]) -> List[str]:
-    docs = nlp().pipe(paragraphs, batch_size=100)
+class AnalysisContext:
+    """
+    Paragraphs plus their spaCy Docs.
+    Docs are produced by a single batched nlp.pipe pass on first access and
+    then shared by every rule, so a document is parsed exactly once.
+    """
+    def __init__(self, paragraphs: List[str], n_process: int = SPACY_N_PROCESS):
+        self.paragraphs = paragraphs
+        self.n_process = n_process
+        self._docs = None
+
+    @property
+    def docs(self) -> list:
+        if self._docs is None:
+            model = nlp()
+            with stage("spacy"):
+                self._docs = list(model.pipe(
+                    self.paragraphs, batch_size=SPACY_BATCH_SIZE, n_process=self.n_process
+                ))
+        return self._docs
+
+def _context(paragraphs) -> AnalysisContext:
+    # rules accept either a plain paragraph list or a shared context
+    return paragraphs if isinstance(paragraphs, AnalysisContext) else AnalysisContext(paragraphs)
+
+def sent_tokens(paragraphs) -> List[str]:
     sents: List[str] = []
-    for d in docs:
+    for d in _context(paragraphs).docs:
         sents.extend([s.text.strip() for s in d.sents if s.text.strip()])
     return sents
 
@@ -30,10 +49,9 @@ def is_passive(sent_doc) -> bool:
             return True
     return False
 
-def clarity_long_sentences(paragraphs: List[str]) -> List[Dict]:
+def clarity_long_sentences(paragraphs) -> List[Dict]:
     issues = []
-    for pi, p in enumerate(paragraphs):
-        d = nlp()(p)
+    for pi, d in enumerate(_context(paragraphs).docs):
         for s in d.sents:
             words = [t.text for t in s if t.is_alpha or t.is_punct]
             if len([t for t in s if t.is_alpha]) > LONG_SENTENCE_THRESHOLD:
@@ -46,40 +64,75 @@ def clarity_long_sentences(paragraphs: List[str]) -> List[Dict]:
                 })
     return issues
 
+@lru_cache(maxsize=1)
+def lexicon() -> Lexicon:
+    """Built-in word lists plus the configured style guide, compiled once per process."""
+    lex_rules = [
+        LexRule("WEASEL_WORDS", "Weasel word detected: '{term}'.", WEASEL),
+        LexRule("JARGON", "Jargon detected: '{term}'.", JARGON),
+    ]
+    if config.STYLE_GUIDE_PATH:
+        lex_rules += load_rules(config.STYLE_GUIDE_PATH)
+    return Lexicon(lex_rules)
+
 def style_weasel_jargon(paragraphs: List[str]) -> List[Dict]:
-    issues = []
-    for pi, p in enumerate(paragraphs):
-        tokens = [t.lower() for t in re.findall(r"[A-Za-z']+", p)]
-        if any(w in WEASEL for w in tokens):
-            issues.append({
-                "category": "style",
-                "severity": "low",
-                "message": "Weasel words detected (e.g., very/really/quite).",
-                "rule": "WEASEL_WORDS",
-                "location": {"paragraph": pi},
-            })
-        if any(w in JARGON for w in tokens):
-            issues.append({
-                "category": "style",
-                "severity": "low",
-                "message": "Jargon detected (e.g., leverage/utilize/synergy).",
-                "rule": "JARGON",
-                "location": {"paragraph": pi},
-            })
-    return issues
+    # one compiled pass per paragraph; every hit reported with its offsets
+    return lexicon().issues(paragraphs)
+
+def _round(number: float, points: int) -> float:
+    # textstat's legacy rounding (half away from zero)
+    p = 10 ** points
+    return math.floor(number * p + math.copysign(0.5, number)) / p
+
+class ReadabilityTally:
+    """
+    Running counts behind the readability metrics, fed one text window at a
+    time so a long document never has to be joined into a single string.
+    Formulas and rounding follow textstat's English defaults.
+    """
+    def __init__(self):
+        self.words = 0
+        self.sentences = 0
+        self.syllables = 0
+        self.polysyllables = 0
+        self.chars = 0
+
+    def add(self, text: str) -> None:
+        import textstat
+        self.words += textstat.lexicon_count(text)
+        self.syllables += textstat.syllable_count(text)
+        self.polysyllables += textstat.polysyllabcount(text)
+        self.chars += textstat.char_count(text)
+        # textstat.sentence_count without its max(1, ...) floor, so windows add up
+        sentences = re.findall(r"\b[^.!?]+[.!?]*", text, re.UNICODE)
+        self.sentences += sum(1 for s in sentences if textstat.lexicon_count(s) > 2)
+
+    def metrics(self) -> Dict:
+        sentences = max(1, self.sentences)
+        asl = _round(self.words / sentences, 1)
+        aspw = _round(self.syllables / self.words, 1) if self.words else 0.0
+        smog = 0.0
+        if self.sentences >= 3:
+            smog = _round(1.043 * (30 * (self.polysyllables / sentences)) ** .5 + 3.1291, 1)
+        ari = 0.0
+        if self.words:
+            ari = _round(4.71 * _round(self.chars / self.words, 2)
+                         + 0.5 * _round(self.words / sentences, 2) - 21.43, 1)
+        return {
+            "flesch_reading_ease": _round(206.835 - 1.015 * asl - 84.6 * aspw, 2),
+            "smog_index": smog,
+            "automated_readability_index": ari,
+            "avg_sentence_length": asl,
+        }
 
 def readability_metrics(text: str) -> Dict:
-    return {
-        "flesch_reading_ease": textstat.flesch_reading_ease(text),
-        "smog_index": textstat.smog_index(text),
-        "automated_readability_index": textstat.automated_readability_index(text),
-        "avg_sentence_length": textstat.avg_sentence_length(text),
-    }
+    tally = ReadabilityTally()
+    tally.add(text)
+    return tally.metrics()
 
-def passive_voice_issues(paragraphs: List[str]) -> List[Dict]:
+def passive_voice_issues(paragraphs) -> List[Dict]:
     issues = []
-    for pi, p in enumerate(paragraphs):
-        d = nlp()(p)
+    for pi, d in enumerate(_context(paragraphs).docs):
         for s in d.sents:
             if is_passive(s):
                 issues.append({
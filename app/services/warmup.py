@@ -0,0 +1,91 @@
+"""
+Startup warm-up and readiness.
+start() loads LanguageTool and spaCy on a background thread and then runs
+every registered rule once over a short sample, so the first real request
+finds the JVM up, the parser loaded and the lexicon compiled. Failed attempts
+are retried with backoff, then at a slow rate for as long as they keep failing,
+so /ready recovers without a restart. /ready reports the outcome (with per-component
+timings); /health stays a liveness probe but shows the warm-up status too.
+"""
+from __future__ import annotations
+import threading, time
+from typing import Any, Dict, Optional
+from app.core import config
+
+_STATE: Dict[str, Any] = {"status": "cold", "components": {}, "error": None, "attempts": 0}
+_LOCK = threading.Lock()
+_THREAD: Optional[threading.Thread] = None
+
+def _timed(name: str, fn) -> None:
+    started = time.perf_counter()
+    fn()
+    with _LOCK:
+        _STATE["components"][name] = {"seconds": round(time.perf_counter() - started, 3)}
+
+def _check() -> None:
+    # imported here so the registry and rules are built on the warm-up thread
+    from app.services import pipeline, rules as R
+    # LanguageTool answering is what counts, whether or not it flags anything
+    pipeline.run(R.AnalysisContext([config.WARMUP_TEXT]), list(pipeline.RULES))
+    R.readability_metrics(config.WARMUP_TEXT)
+
+def _attempt() -> None:
+    from app.services import models
+    _timed("language_tool", models.LT)
+    _timed("spacy", models.nlp)
+    _timed("check", _check)
+
+def warm_up(attempts: Optional[int] = None) -> Dict[str, Any]:
+    """Load both models and run the warm-up check, retrying with backoff; returns state()."""
+    attempts = config.WARMUP_ATTEMPTS if attempts is None else attempts
+    with _LOCK:
+        # a retry keeps showing the last error until it succeeds
+        _STATE.update(status="warming", components={}, attempts=0, started_at=time.time())
+    delay = config.WARMUP_RETRY_SECONDS
+    for attempt in range(1, attempts + 1):
+        with _LOCK:
+            _STATE["attempts"] = attempt
+        try:
+            _attempt()
+        except Exception as exc:
+            last = attempt == attempts
+            with _LOCK:
+                _STATE.update(error=f"{type(exc).__name__}: {exc}")
+                if last:
+                    _STATE.update(status="failed", finished_at=time.time())
+            if last:
+                break
+            time.sleep(delay)
+            delay = min(delay * 2, config.WARMUP_RETRY_MAX_SECONDS)
+        else:
+            with _LOCK:
+                _STATE.update(status="ready", error=None, finished_at=time.time())
+            break
+    return state()
+
+def _warm_until_ready() -> None:
+    if warm_up()["status"] == "ready":
+        return
+    # keep trying at the slow rate: /ready recovers once the models can load
+    while True:
+        time.sleep(config.WARMUP_RETRY_MAX_SECONDS)
+        if warm_up(attempts=1)["status"] == "ready":
+            return
+
+def start() -> None:
+    """Warm up in the background (if WARMUP_ON_STARTUP) so startup itself is not blocked."""
+    global _THREAD
+    if not config.WARMUP_ON_STARTUP or _THREAD is not None:
+        return
+    with _LOCK:
+        _STATE["status"] = "warming"
+    _THREAD = threading.Thread(target=_warm_until_ready, name="warmup", daemon=True)
+    _THREAD.start()
+
+def state() -> Dict[str, Any]:
+    with _LOCK:
+        return {**_STATE, "components": {k: dict(v) for k, v in _STATE["components"].items()}}
+
+def is_ready() -> bool:
+    # "cold": warm-up disabled, models load lazily on first use
+    return _STATE["status"] in ("ready", "cold")
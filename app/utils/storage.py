@@ -1,34 +1,141 @@
-import os, uuid, tempfile
+import os, re, uuid, tempfile, hashlib, threading
+from typing import Optional
 from fastapi import UploadFile, HTTPException
-import magic
-from app.core.config import ALLOWED_EXTENSIONS, MIME_ALLOW, DATA_DIR
+from app.core.config import (
+    ALLOWED_EXTENSIONS, MIME_ALLOW, DATA_DIR, MAX_UPLOAD_BYTES, HASH_SIDECAR, UPLOAD_INDEX_DIRNAME,
+)
+
+_CHUNK = 1 << 20  # 1 MB
+_DOC_ID = re.compile(r"[0-9a-f]{12}")   # uuid4().hex[:12], as issued by save_secure
+
+_MAGIC = None
+_MAGIC_LOCK = threading.Lock()
+
+def sniff_mime(head: bytes) -> str:
+    """MIME type of a file from its first bytes, using one shared libmagic handle."""
+    global _MAGIC
+    with _MAGIC_LOCK:  # libmagic handles are not thread-safe
+        if _MAGIC is None:
+            import magic  # libmagic binding, loaded on the first upload
+            _MAGIC = magic.Magic(mime=True)
+        return _MAGIC.from_buffer(head)
+
+def _too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail="File too large")
+
+def _index_path(digest: str) -> str:
+    return os.path.join(DATA_DIR, UPLOAD_INDEX_DIRNAME, digest[:2], digest)
+
+def _write_atomic(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+def _write_sidecar(path: str, digest: str) -> None:
+    st = os.stat(path)
+    line = f"{digest} {st.st_size} {st.st_mtime_ns} {os.path.basename(path)}\n"
+    _write_atomic(os.path.join(os.path.dirname(path), HASH_SIDECAR), line)
+
+def _existing_upload(digest: str, ext: str) -> Optional[tuple[str, str]]:
+    """(doc_id, path) of an earlier upload with the same bytes, if it is still there."""
+    try:
+        with open(_index_path(digest)) as f:
+            doc_id = f.read().strip()
+    except OSError:
+        return None
+    path = os.path.join(DATA_DIR, doc_id, f"original{ext}")
+    if os.path.isfile(path) and file_sha256(path) == digest:
+        return doc_id, path
+    return None
 
 async def save_secure(file: UploadFile) -> tuple[str, str]:
+    """
+    Store an upload in one pass: the MIME type is sniffed from the first chunk,
+    the sha256 is computed and the size limit enforced while copying. Bytes
+    identical to an earlier upload return that upload's doc_id instead.
+    """
     _, ext = os.path.splitext(file.filename or "")
     ext = ext.lower()
     if ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(status_code=400, detail="Only .pdf or .docx allowed")
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise _too_large()
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    h = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=DATA_DIR, prefix=".upload-")  # same filesystem as the target
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            while True:
+                chunk = await file.read(_CHUNK)
+                if not chunk:
+                    break
+                if size == 0:
+                    file_mime = sniff_mime(chunk)
+                    if file_mime not in MIME_ALLOW[ext]:
+                        raise HTTPException(
+                            status_code=400,
+                            detail=f"Unexpected MIME type: {file_mime} for {ext}"
+                        )
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise _too_large()
+                h.update(chunk)
+                tmp.write(chunk)
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Empty file")
+
+        digest = h.hexdigest()
+        existing = _existing_upload(digest, ext)
+        if existing is not None:
+            os.remove(tmp_path)
+            return existing
 
-    with tempfile.NamedTemporaryFile(delete=False) as tmp:
-        while True:
-            chunk = await file.read(1 << 20)  # 1 MB
-            if not chunk:
-                break
-            tmp.write(chunk)
-        tmp_path = tmp.name
-
-    mime = magic.Magic(mime=True)
-    file_mime = mime.from_file(tmp_path)
-    if file_mime not in MIME_ALLOW[ext]:
-        os.remove(tmp_path)
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unexpected MIME type: {file_mime} for {ext}"
-        )
-
-    doc_id = uuid.uuid4().hex[:12]
-    doc_dir = os.path.join(DATA_DIR, doc_id)
-    os.makedirs(doc_dir, mode=0o700, exist_ok=True)
-    dest = os.path.join(doc_dir, f"original{ext}")
-    os.replace(tmp_path, dest)
+        doc_id = uuid.uuid4().hex[:12]
+        doc_dir = os.path.join(DATA_DIR, doc_id)
+        os.makedirs(doc_dir, mode=0o700, exist_ok=True)
+        dest = os.path.join(doc_dir, f"original{ext}")
+        os.replace(tmp_path, dest)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _write_sidecar(dest, digest)
+    _write_atomic(_index_path(digest), doc_id)
     return doc_id, dest
+
+def file_sha256(path: str) -> str:
+    """sha256 of a file; for uploads, read from the sidecar written at upload time."""
+    sidecar = os.path.join(os.path.dirname(path), HASH_SIDECAR)
+    try:
+        with open(sidecar) as f:
+            digest, size, mtime_ns, name = f.read().split()
+        st = os.stat(path)
+        if name == os.path.basename(path) and int(size) == st.st_size and int(mtime_ns) == st.st_mtime_ns:
+            return digest
+    except (OSError, ValueError):
+        pass
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def doc_dir(doc_id: str) -> str:
+    """Folder of doc_id under DATA_DIR; 404 for anything /upload never issued (e.g. '../x')."""
+    if not _DOC_ID.fullmatch(doc_id or ""):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return os.path.join(DATA_DIR, doc_id)
+
+def original_path(doc_id: str) -> str:
+    """Path of the uploaded original for doc_id, or 404."""
+    folder = doc_dir(doc_id)
+    if not os.path.isdir(folder):
+        raise HTTPException(status_code=404, detail="Document not found")
+    originals = [f for f in os.listdir(folder) if f.startswith("original.")]
+    if not originals:
+        raise HTTPException(status_code=404, detail="No original file found")
+    return os.path.join(folder, originals[0])
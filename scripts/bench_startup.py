@@ -0,0 +1,54 @@
+"""
+Start-up benchmark: import app.main in fresh interpreters under
+`python -X importtime` and report the wall time, the slowest modules and
+any heavy dependency that got imported eagerly.
+
+    python scripts/bench_startup.py [--runs 5] [--top 15] [--module app.main]
+"""
+from __future__ import annotations
+import argparse, os, statistics, subprocess, sys, time
+
+HEAVY = ("spacy", "language_tool_python", "fitz", "pymupdf", "docx", "textstat", "magic")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _run(module: str) -> tuple[float, str, str]:
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return time.perf_counter() - started, proc.stdout.strip(), proc.stderr
+
+def _cumulative(importtime: str) -> list[tuple[int, str]]:
+    # lines look like: "import time:   self [us] | cumulative | imported package"
+    rows = []
+    for line in importtime.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    return rows
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--module", default="app.main")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--top", type=int, default=15)
+    args = ap.parse_args()
+
+    walls, heavy, last = [], "", ""
+    for _ in range(args.runs):
+        wall, heavy, last = _run(args.module)
+        walls.append(wall)
+
+    print(f"import {args.module}: median {statistics.median(walls) * 1000:.0f} ms, "
+          f"min {min(walls) * 1000:.0f} ms over {args.runs} runs (interpreter start included)")
+    print(f"heavy modules imported eagerly: {heavy or 'none'}")
+    print("\nslowest imports (cumulative, last run):")
+    for us, name in sorted(_cumulative(last), reverse=True)[: args.top]:
+        print(f"{us / 1000:9.1f} ms  {name}")
+    if heavy:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -67,7 +67,7 @@ def sample_docx_bytes() -> bytes:
 # --------------------------------------------------------------------
 @pytest.fixture(autouse=True)
 def stub_language_tool(monkeypatch):
-    from app.services import analyze as analyze_mod
+    from app.services import models as models_mod
     from app.services import revise as revise_mod
 
     # Fake issue match
@@ -85,10 +85,10 @@ def stub_language_tool(monkeypatch):
         def check(self, text: str):
             return [_FakeMatch()] if "smaple" in text else []
 
-    if hasattr(analyze_mod, "LanguageTool"):
-        monkeypatch.setattr(analyze_mod, "LanguageTool", lambda *a, **k: _FakeLT())
-        if hasattr(analyze_mod, "_LT"):
-            analyze_mod._LT = None
+    if hasattr(models_mod, "LanguageTool"):
+        monkeypatch.setattr(models_mod, "LanguageTool", lambda *a, **k: _FakeLT())
+        if hasattr(models_mod, "_LT"):
+            models_mod._LT = None
 
     # Stub auto_correct_text in revise
     def _fake_auto_correct(paragraphs: list[str]) -> list[str]:
@@ -1,5 +1,6 @@
 # tests/test_analyze.py
 import io
+import os
 
 def _upload_pdf(client, pdf_bytes):
     files = {"file": ("in.pdf", io.BytesIO(pdf_bytes), "application/pdf")}
@@ -55,3 +56,111 @@ def test_analyze_summary_only(client, sample_pdf_bytes):
     # Issues may be included or omitted in summary-only mode
     if "issues" in payload:
         assert isinstance(payload["issues"], list)
+
+
+def test_iter_analysis_streams_windows():
+    from app.services.analyze import iter_analysis
+
+    pulled = []
+
+    def paragraphs():
+        for i in range(10):
+            pulled.append(i)
+            yield f"Paragraph number {i} is really short."
+
+    events = iter_analysis(paragraphs())
+    first = next(events)
+    # the first window is emitted before the rest of the document is read
+    assert first["type"] == "issues" and first["paragraphs"] == [0, 4]
+    assert len(pulled) < 10
+
+    rest = list(events)
+    assert [e["type"] for e in rest] == ["issues", "summary"]
+    assert rest[0]["paragraphs"] == [4, 10]
+    style = first["issues"]["style"] + rest[0]["issues"]["style"]
+    assert sorted({i["location"]["paragraph"] for i in style}) == list(range(10))
+    assert rest[-1]["summary"].totals["style"] == len(style)
+
+
+def test_analyze_stream_ndjson(client, sample_docx_bytes):
+    import json
+    files = {"file": ("stream.docx", io.BytesIO(sample_docx_bytes),
+                      "application/vnd.openxmlformats-officedocument.wordprocessingml.document")}
+    doc_id = client.post("/upload", files=files).json()["doc_id"]
+    r = client.get(f"/analyze/stream?doc_id={doc_id}")
+    assert r.status_code == 200, r.text
+    records = [json.loads(line) for line in r.text.splitlines()]
+    assert records[-1]["type"] == "summary"
+    assert all(rec["type"] == "issue" for rec in records[:-1])
+    assert any(rec["rule"] == "FAKE_RULE" for rec in records[:-1])
+
+    # replayed from the report cache, same content
+    again = client.post(f"/analyze/stream?doc_id={doc_id}&format=sse")
+    assert again.text.count("event: issue") == len(records) - 1
+    assert "event: summary" in again.text
+
+
+def test_stream_and_analyze_list_the_same_issues(client, monkeypatch):
+    import docx, json, uuid
+    from app.services import analyze
+
+    # enough paragraphs for several stream windows, each with grammar and style hits
+    tag = uuid.uuid4().hex
+    d = docx.Document()
+    for k in range(9):
+        d.add_paragraph(f"This is a smaple {tag} that we utilize, paragraph {k}.")
+    buf = io.BytesIO()
+    d.save(buf)
+    files = {"file": ("order.docx", io.BytesIO(buf.getvalue()),
+                      "application/vnd.openxmlformats-officedocument.wordprocessingml.document")}
+    doc_id = client.post("/upload", files=files).json()["doc_id"]
+
+    def streamed():
+        lines = client.get(f"/analyze/stream?doc_id={doc_id}").text.splitlines()
+        return [(r["id"], r["rule"]) for r in map(json.loads, lines) if r["type"] == "issue"]
+
+    live = streamed()
+    replayed = streamed()
+    with monkeypatch.context() as m:
+        m.setattr(analyze.REPORTS, "get", lambda key: None)   # force a fresh /analyze
+        fresh = [(i["id"], i["rule"]) for i in client.post(f"/analyze?doc_id={doc_id}").json()["issues"]]
+
+    assert live == replayed == fresh
+    assert len({i for i, _ in live}) == len(live)
+    assert live[0] == ("FAKE_RULE-0-10-6", "FAKE_RULE")
+
+
+def _paragraph_cache_files() -> set:
+    from app.services.cache import PARAGRAPHS
+    return {os.path.join(d, f) for d, _, files in os.walk(PARAGRAPHS.root) for f in files}
+
+
+def test_analyze_text_in_memory(client):
+    before = _paragraph_cache_files()
+    r = client.post("/analyze/text", json={"text": "This is a smaple.\n\nIt is really fine."})
+    assert r.status_code == 200, r.text
+    assert _paragraph_cache_files() == before   # nothing written under DATA_DIR
+    report = r.json()
+    assert report["doc_id"] == "text"
+    assert {i["location"]["paragraph"] for i in report["issues"]} == {0, 1}
+
+    r = client.post("/analyze/text", json={"paragraphs": ["Short one."], "doc_id": "draft-7"})
+    assert r.status_code == 200 and r.json()["doc_id"] == "draft-7"
+
+    assert client.post("/analyze/text", json={}).status_code == 422
+
+
+def test_rule_selection_and_timings(client):
+    text = {"text": "This is a smaple that is really long enough."}
+    full = client.post("/analyze/text", json=text).json()
+    assert set(full["summary"]["rules"]) == {"grammar", "style", "long_sentences", "passive_voice"}
+    assert full["summary"]["rules"]["style"]["issues"] >= 1
+
+    only = client.post("/analyze/text", json={**text, "skip": ["grammar"]}).json()
+    assert "grammar" not in only["summary"]["rules"]
+    assert all(i["category"] != "grammar" for i in only["issues"])
+
+    assert client.post("/analyze/text", json={**text, "rules": ["nope"]}).status_code == 400
+
+    metrics = client.get("/metrics/rules").json()["rules"]
+    assert metrics["style"]["calls"] >= 1 and "seconds" in metrics["style"]
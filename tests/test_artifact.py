@@ -0,0 +1,56 @@
+# tests/test_artifact.py
+import io
+import os
+
+from app.services import artifact, extract
+
+
+def _upload(client, name, data, mime):
+    r = client.post("/upload", files={"file": (name, io.BytesIO(data), mime)})
+    assert r.status_code == 200, r.text
+    return r.json()["stored_path"]
+
+
+def test_upload_writes_artifact_and_readers_use_it(client, sample_pdf_bytes, monkeypatch):
+    path = _upload(client, "a.pdf", sample_pdf_bytes, "application/pdf")
+    assert os.path.exists(artifact.artifact_path(path))
+
+    expected = list(extract._pdf_blocks(path))
+    with artifact.load(path) as art:
+        assert art.has_blocks and len(art) == len(expected)
+        assert list(art.blocks()) == expected
+        assert len(art.digest(0)) == 64
+        stored = art.digest(0)
+
+    # analysis keys the paragraph cache on the stored digest: same key as hashing the text
+    from app.services.analyze import paragraph_key
+    text, digest = next(extract.iter_digested_paragraphs(path))
+    assert digest == stored
+    assert paragraph_key(text, "fp", digest) == paragraph_key(text, "fp")
+
+    # later stages never reopen the PDF
+    def _no_pdf(_path):
+        raise AssertionError("re-extracted the original")
+    monkeypatch.setattr(extract, "_pdf_blocks", _no_pdf)
+    assert list(extract.iter_pdf_blocks(path)) == expected
+    assert extract.extract_text(path) == [t for _, _, t in expected]
+
+
+def test_docx_artifact_and_stale_artifact_is_ignored(client, sample_docx_bytes):
+    mime = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+    path = _upload(client, "a.docx", sample_docx_bytes, mime)
+    with artifact.load(path) as art:
+        assert not art.has_blocks
+        assert list(art) == list(extract._paragraphs(path))
+
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert artifact.load(path) is None
+    assert extract.extract_text(path) == list(extract._paragraphs(path))
+
+
+def test_failed_extraction_is_logged(tmp_path, caplog):
+    bad = tmp_path / "original.docx"
+    bad.write_bytes(b"not a zip")
+    assert extract.build_artifact(str(bad)) is None
+    assert "Could not build the paragraph artifact" in caplog.text
@@ -0,0 +1,72 @@
+# tests/test_batch.py
+import io
+import json
+
+
+def _upload_docx(client, b):
+    files = {"file": ("b.docx", io.BytesIO(b),
+                      "application/vnd.openxmlformats-officedocument.wordprocessingml.document")}
+    return client.post("/upload", files=files).json()["doc_id"]
+
+
+def test_batch_analyze_keeps_request_order(client, sample_docx_bytes, sample_pdf_bytes):
+    a = _upload_docx(client, sample_docx_bytes)
+    files = {"file": ("b.pdf", io.BytesIO(sample_pdf_bytes), "application/pdf")}
+    b = client.post("/upload", files=files).json()["doc_id"]
+
+    r = client.post("/batch/analyze", json={"doc_ids": [b, "missing", a]})
+    assert r.status_code == 200, r.text
+    results = r.json()["results"]
+    assert [x["doc_id"] for x in results] == [b, "missing", a]
+    assert results[0]["status"] == 200 and "score" in results[0]["result"]
+    assert results[1]["status"] == 404
+
+
+def test_batch_revise_stream(client, sample_docx_bytes):
+    a = _upload_docx(client, sample_docx_bytes)
+    r = client.post("/batch/revise?stream=true", json={"doc_ids": [a], "fmt": "txt"})
+    assert r.status_code == 200
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert lines[0]["doc_id"] == a
+    assert lines[0]["result"]["corrected_path"].endswith("corrected.txt")
+
+
+def test_batch_documents_are_admitted_one_by_one(monkeypatch):
+    import threading, time
+    from app.services.admission import ADMISSION
+    from app.services.batch import run_batch
+
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def fn(doc_id):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return doc_id
+
+    # each document costs one unit; a one-unit budget runs the batch serially
+    monkeypatch.setattr(ADMISSION, "client_units", 1)
+    ids = [f"{k:012x}" for k in range(5)]
+    results = run_batch(ids, fn, client="batcher")
+    assert [r["status"] for r in results] == [200] * 5
+    assert peak[0] == 1
+    assert ADMISSION.in_flight == 0
+
+    # nothing of its own to wait for: the document is answered 429, not queued
+    monkeypatch.setattr(ADMISSION, "global_units", 1)
+    assert ADMISSION.try_acquire("someone-else", 1)
+    try:
+        assert [r["status"] for r in run_batch(ids[:2], fn, client="batcher")] == [429, 429]
+    finally:
+        ADMISSION.release("someone-else", 1)
+
+
+def test_repeated_doc_ids_run_once(client, sample_docx_bytes):
+    a = _upload_docx(client, sample_docx_bytes)
+    r = client.post("/batch/analyze", json={"doc_ids": [a, "missing", a, "missing", a]})
+    assert r.status_code == 200, r.text
+    assert [x["doc_id"] for x in r.json()["results"]] == [a, "missing"]
@@ -0,0 +1,79 @@
+# tests/test_cache.py
+import io
+
+from app.services.cache import DiskCache, MemoryCache, REPORTS
+
+
+def test_disk_cache_hit_miss_and_eviction():
+    c = DiskCache("test-lru", max_bytes=200)
+    assert c.get("aa01") is None
+    c.put("aa01", {"v": "x" * 50})
+    assert c.get("aa01") == {"v": "x" * 50}
+    for i in range(2, 8):
+        c.put(f"aa0{i}", {"v": "x" * 50})
+    stats = c.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["evictions"] > 0
+    assert stats["bytes"] <= 200
+    # the newest entry always survives eviction
+    assert c.get("aa07") is not None
+
+
+def test_overwriting_a_key_does_not_grow_the_size():
+    c = DiskCache("test-overwrite", max_bytes=10_000)
+    c.put("bb01", {"v": "x" * 50})
+    size = c.stats()["bytes"]
+    for _ in range(5):
+        c.put("bb01", {"v": "x" * 50})
+    assert c.stats()["bytes"] == size
+    assert c.stats()["evictions"] == 0
+
+
+def test_memory_cache_returns_copies_and_evicts_oldest():
+    c = MemoryCache(max_bytes=40)
+    c.put("a", {"v": [1]})
+    c.get("a")["v"].append(2)          # callers mutate what they get back
+    assert c.get("a") == {"v": [1]}
+    c.put("b", {"v": "x" * 10})
+    c.get("a")                         # "a" is now the most recently used
+    c.put("c", {"v": "y" * 10})
+    assert c.get("b") is None and c.get("a") is not None
+    assert c.stats()["evictions"] == 1 and c.stats()["bytes"] <= 40
+
+
+def test_repeat_analyze_is_served_from_cache(client, sample_docx_bytes):
+    files = {"file": ("again.docx", io.BytesIO(sample_docx_bytes),
+                      "application/vnd.openxmlformats-officedocument.wordprocessingml.document")}
+    doc_id = client.post("/upload", files=files).json()["doc_id"]
+    first = client.post(f"/analyze?doc_id={doc_id}").json()
+    hits = REPORTS.hits
+    second = client.post(f"/analyze?doc_id={doc_id}").json()
+    assert REPORTS.hits == hits + 1
+    assert second == first
+
+
+def test_only_changed_paragraphs_are_rechecked(monkeypatch):
+    import uuid
+    from app.services import analyze, models
+
+    checked = []
+
+    class _CountingLT:
+        def check(self, text):
+            checked.append(text)
+            return []
+
+    monkeypatch.setattr(models, "_LT", _CountingLT())
+    tag = uuid.uuid4().hex
+    first = [f"Intro {tag}.", f"Body {tag} is very short.", f"End {tag}."]
+    analyze.paragraph_issues(first)
+    checked.clear()
+
+    edited = [f"New {tag}.", first[0], first[1], f"Changed end {tag}."]
+    buckets = analyze.paragraph_issues(edited)
+    assert len(buckets) == 4
+    # the cached style hit moved from paragraph 1 to paragraph 2
+    assert buckets[2]["style"][0]["location"]["paragraph"] == 2
+    sent = "\n\n".join(checked)
+    assert edited[0] in sent and edited[3] in sent
+    assert first[0] not in sent and first[1] not in sent
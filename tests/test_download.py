@@ -0,0 +1,86 @@
+# tests/test_download.py
+import io
+
+import docx
+
+
+def _corrected_txt(client):
+    d = docx.Document()
+    for i in range(200):
+        d.add_paragraph(f"Paragraph {i} is a smaple of the text we revise and download.")
+    buf = io.BytesIO()
+    d.save(buf)
+    mime = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+    doc_id = client.post("/upload", files={"file": ("dl.docx", buf.getvalue(), mime)}).json()["doc_id"]
+    assert client.post(f"/revise?doc_id={doc_id}&fmt=txt").status_code == 200
+    return f"/download?doc_id={doc_id}&filename=corrected.txt"
+
+
+def test_etag_and_conditional_get(client):
+    url = _corrected_txt(client)
+    r = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert r.status_code == 200
+    tag = r.headers["etag"]
+    assert tag.startswith('"') and len(tag) == 66
+    assert r.headers["accept-ranges"] == "bytes"
+
+    again = client.get(url, headers={"Accept-Encoding": "identity", "If-None-Match": tag})
+    assert again.status_code == 304 and again.content == b""
+
+
+def test_range_requests(client):
+    url = _corrected_txt(client)
+    full = client.get(url, headers={"Accept-Encoding": "identity"}).content
+
+    r = client.get(url, headers={"Range": "bytes=10-19"})
+    assert r.status_code == 206
+    assert r.content == full[10:20]
+    assert r.headers["content-range"] == f"bytes 10-19/{len(full)}"
+    assert client.get(url, headers={"Range": "bytes=-5"}).content == full[-5:]
+
+    r = client.get(url, headers={"Range": f"bytes={len(full)}-"})
+    assert r.status_code == 416
+    assert r.headers["content-range"] == f"bytes */{len(full)}"
+
+    # a stale If-Range gets the whole file
+    r = client.get(url, headers={"Range": "bytes=0-1", "If-Range": '"stale"', "Accept-Encoding": "identity"})
+    assert r.status_code == 200 and r.content == full
+
+
+def test_gzip_variant(client):
+    url = _corrected_txt(client)
+    full = client.get(url, headers={"Accept-Encoding": "identity"}).content
+
+    r = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert r.headers["etag"].endswith('-gz"')
+    assert int(r.headers["content-length"]) < len(full) * 0.9
+    assert r.content == full   # decoded by the client
+    assert client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": r.headers["etag"]}).status_code == 304
+
+
+def test_download_rejects_paths_outside_the_doc_folder(client):
+    url = _corrected_txt(client)
+    assert client.get(url.replace("corrected.txt", "../README.md")).status_code == 404
+    for doc_id in ("../app/core", "..", "abc"):
+        r = client.get("/download", params={"doc_id": doc_id, "filename": "config.py"})
+        assert r.status_code == 404
+
+
+def test_only_rendering_a_download_is_admission_controlled(client, monkeypatch):
+    from app.services.admission import ADMISSION
+
+    url = _corrected_txt(client)              # rendered by /revise?fmt=txt
+    pdf = url.replace("filename=corrected.txt", "format=pdf")
+    monkeypatch.setattr(ADMISSION, "global_units", 1)
+    assert ADMISSION.try_acquire("someone-else", 1)
+    try:
+        assert client.get(url).status_code == 200      # served from disk, no units needed
+        r = client.get(pdf)                            # would have to render
+        assert r.status_code == 429 and int(r.headers["Retry-After"]) > 0
+    finally:
+        ADMISSION.release("someone-else", 1)
+    assert client.get(pdf).status_code == 200
+    assert ADMISSION.in_flight == 0
@@ -0,0 +1,24 @@
+# tests/test_engine.py
+from app.core import config
+from app.services.engine import AnalysisEngine, run_rules
+
+NAMES = ["style", "long_sentences", "passive_voice"]
+
+
+def test_process_pool_matches_inline(monkeypatch):
+    monkeypatch.setattr(config, "ENGINE_MIN_PARAGRAPHS", 1)
+    monkeypatch.setattr(config, "ENGINE_CHUNK_PARAGRAPHS", 3)
+    paragraphs = [f"Paragraph {i} is really quite short." for i in range(7)]
+    paragraphs[5] = "We leverage synergy to utilize the paradigm."
+
+    engine = AnalysisEngine(workers=2, max_tasks_per_child=2)
+    try:
+        pooled, timings = engine.submit(paragraphs, NAMES).result(timeout=120)
+    finally:
+        engine.shutdown()
+
+    inline, _ = run_rules(paragraphs, NAMES)
+    assert pooled == inline
+    assert {i["location"]["paragraph"] for i in pooled["style"]} == set(range(7))
+    # one call per chunk, merged back from the workers
+    assert timings["style"]["calls"] == 3
@@ -0,0 +1,49 @@
+# tests/test_grammar.py
+import re
+
+from app.core import config
+from app.services import grammar, models
+
+
+class _Match:
+    def __init__(self, offset, length, rule="MORFOLOGIK_RULE_EN_US"):
+        self.offset = offset
+        self.errorLength = length
+        self.ruleId = rule
+
+
+class _LT:
+    def __init__(self):
+        self.calls = 0
+
+    def check(self, text):
+        self.calls += 1
+        return [_Match(m.start(), len(m.group())) for m in re.finditer("smaple", text)]
+
+
+def test_chunked_offsets_are_paragraph_relative(monkeypatch):
+    lt = _LT()
+    monkeypatch.setattr(models, "_LT", lt)
+    monkeypatch.setattr(config, "LT_CHUNK_CHARS", 40)
+    monkeypatch.setattr(config, "LT_WORKERS", 4)
+    paragraphs = ["A smaple here.", "Clean text.", "Two smaple and smaple.", "", "smaple"]
+
+    results = grammar.check_paragraphs(paragraphs)
+
+    assert 1 < lt.calls < len(paragraphs)
+    for p, matches in zip(paragraphs, results):
+        assert [off for off, _ in matches] == [m.start() for m in re.finditer("smaple", p)]
+
+
+def test_text_level_rule_matches_are_dropped(monkeypatch):
+    class _RepeatLT:
+        def check(self, text):
+            # a text-level rule sees the chunk's other paragraphs, not the document's
+            starts = [m.start() for m in re.finditer("The", text)]
+            return [_Match(s, 3, "ENGLISH_WORD_REPEAT_BEGINNING_RULE") for s in starts[2:]] + \
+                   [_Match(m.start(), 6) for m in re.finditer("smaple", text)]
+
+    monkeypatch.setattr(models, "_LT", _RepeatLT())
+    paragraphs = ["The cat sat.", "The dog ran.", "The smaple bird flew."]
+    results = grammar.check_paragraphs(paragraphs)
+    assert [[m.ruleId for _, m in found] for found in results] == [[], [], ["MORFOLOGIK_RULE_EN_US"]]
@@ -0,0 +1,80 @@
+# tests/test_jobs.py
+import io
+import time
+
+
+def _upload_pdf(client, pdf_bytes):
+    files = {"file": ("in.pdf", io.BytesIO(pdf_bytes), "application/pdf")}
+    r = client.post("/upload", files=files)
+    assert r.status_code == 200, r.text
+    return r.json()["doc_id"]
+
+
+def _wait(client, job_id, timeout=30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        info = client.get(f"/jobs/{job_id}").json()
+        if info["status"] in ("done", "failed"):
+            return info
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+
+def test_background_analyze(client, sample_pdf_bytes):
+    doc_id = _upload_pdf(client, sample_pdf_bytes)
+    r = client.post(f"/analyze?doc_id={doc_id}&background=true")
+    assert r.status_code == 202, r.text
+    job_id = r.json()["job_id"]
+
+    assert _wait(client, job_id)["status"] == "done"
+    result = client.get(f"/jobs/{job_id}/result")
+    assert result.status_code == 200
+    assert result.json()["doc_id"] == doc_id
+
+
+def test_background_revise_and_events(client, sample_pdf_bytes):
+    doc_id = _upload_pdf(client, sample_pdf_bytes)
+    r = client.post(f"/revise?doc_id={doc_id}&fmt=txt&background=true")
+    assert r.status_code == 202, r.text
+    job_id = r.json()["job_id"]
+
+    events = client.get(f"/jobs/{job_id}/events")
+    assert events.status_code == 200
+    assert '"status": "done"' in events.text
+    assert client.get(f"/jobs/{job_id}/result").json()["format"] == "txt"
+
+
+def test_unknown_job(client):
+    assert client.get("/jobs/nope").status_code == 404
+
+
+def test_background_jobs_hold_admission_units(client, sample_pdf_bytes, monkeypatch):
+    import threading
+    import pytest
+    from fastapi import HTTPException
+    from app.services.admission import ADMISSION
+    from app.services.jobs import JobQueue
+
+    monkeypatch.setattr(ADMISSION, "client_units", 1)
+    # the request itself is not charged on top of its job
+    doc_id = _upload_pdf(client, sample_pdf_bytes)
+    r = client.post(f"/analyze?doc_id={doc_id}&background=true")
+    assert r.status_code == 202, r.text
+    assert _wait(client, r.json()["job_id"])["status"] == "done"
+
+    queue, gate = JobQueue(workers=1), threading.Event()
+    try:
+        job = queue.submit("slow", gate.wait, client="c")
+        with pytest.raises(HTTPException) as exc:
+            queue.submit("slow", gate.wait, client="c")     # still queued or running: over budget
+        assert exc.value.status_code == 429
+        gate.set()
+        job.future.result(timeout=5)
+        deadline = time.time() + 5           # done callbacks run just after waiters wake
+        while ADMISSION.in_flight and time.time() < deadline:
+            time.sleep(0.01)
+        assert ADMISSION.in_flight == 0
+        queue.submit("slow", gate.wait, client="c").future.result(timeout=5)
+    finally:
+        gate.set()
+        queue.shutdown()
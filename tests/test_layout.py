@@ -0,0 +1,18 @@
+# tests/test_layout.py
+from app.services import layout
+
+
+def test_wrap_fits_width_and_keeps_words():
+    m = layout.metrics(12.0)
+    text = " ".join(["paragraph", "wrapping", "should", "respect", "the", "margin"] * 30)
+    lines = m.wrap(text, 200)
+    assert len(lines) > 1
+    assert " ".join(lines) == text
+    for line in lines:
+        # summed word widths must agree with measuring the whole line
+        assert m.font.text_length(line, fontsize=12.0) <= 200 + 1e-6
+
+
+def test_font_is_loaded_once():
+    assert layout.metrics(12.0).font is layout.load_font()
+    assert layout.metrics(12.0) is layout.metrics(12.0)
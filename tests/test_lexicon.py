@@ -0,0 +1,65 @@
+# tests/test_lexicon.py
+import json
+import random
+import string
+
+from app.services.lexicon import Lexicon, LexRule, load_rules
+from app.services.rules import style_weasel_jargon
+
+
+def test_every_hit_with_offsets():
+    lex = Lexicon([
+        LexRule("WEASEL_WORDS", "Weasel word detected: '{term}'.", ["very", "really"]),
+        LexRule("WORDY", "Wordy phrase: '{term}'.", {"in order to": "to", "in order": "to"}),
+    ])
+    text = "We really, REALLY want this in  order to work. Everything is fine, not very-very."
+    issues = lex.issues([text])
+    spans = [(text[i["location"]["start"]:i["location"]["end"]], i["rule"]) for i in issues]
+    assert spans == [
+        ("really", "WEASEL_WORDS"), ("REALLY", "WEASEL_WORDS"),
+        ("in  order to", "WORDY"), ("very", "WEASEL_WORDS"), ("very", "WEASEL_WORDS"),
+    ]
+    assert issues[2]["suggestion"] == "to"
+    # whole tokens only: "Everything" does not contain a hit for "very"
+    assert all(i["location"]["start"] != text.index("Everything") + 1 for i in issues)
+
+
+def test_large_style_guide(tmp_path):
+    rnd = random.Random(7)
+    terms = {"".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(4, 12))) for _ in range(5000)}
+    path = tmp_path / "guide.json"
+    path.write_text(json.dumps([{"rule": "HOUSE_STYLE", "message": "Avoid '{term}'.", "terms": sorted(terms)}]))
+    lex = Lexicon(load_rules(str(path)))
+    term = sorted(terms)[1234]
+    hits = lex.scan(f"Please do not write {term.upper()} here.")
+    assert [(h[2], h[3].rule) for h in hits] == [(term, "HOUSE_STYLE")]
+
+
+def test_case_folded_matches_map_back_to_their_term():
+    issues = style_weasel_jargon(["We UTİLIZE it.", "REALLY ſynergy"])
+    assert [(i["rule"], i["location"]["paragraph"]) for i in issues] == [
+        ("JARGON", 0), ("WEASEL_WORDS", 1), ("JARGON", 1),
+    ]
+    assert "'utilize'" in issues[0]["message"] and "'synergy'" in issues[2]["message"]
+
+
+def test_later_rule_takes_over_a_repeated_term(caplog):
+    lex = Lexicon([LexRule("A", "a", ["very", "quite"]), LexRule("B", "b", ["Very"])])
+    assert [(term, r.rule) for _, _, term, r in lex.scan("very quite")] == [("very", "B"), ("quite", "A")]
+    assert "listed in both A and B" in caplog.text
+
+
+def test_style_guide_can_override_a_built_in_term(client, tmp_path, monkeypatch):
+    from app.services import rules
+
+    path = tmp_path / "house.json"
+    path.write_text(json.dumps([{"rule": "HOUSE", "message": "House style: '{term}'.", "terms": {"utilize": "use"}}]))
+    monkeypatch.setattr(rules.config, "STYLE_GUIDE_PATH", str(path))
+    rules.lexicon.cache_clear()
+    try:
+        r = client.post("/analyze/text", json={"text": "We utilize it."})
+        assert r.status_code == 200, r.text
+        assert [(i["rule"], i["suggestion"]) for i in r.json()["issues"]] == [("HOUSE", "use")]
+    finally:
+        monkeypatch.undo()
+        rules.lexicon.cache_clear()
@@ -0,0 +1,52 @@
+# tests/test_limits.py
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.middleware.limits import BodySizeLimitMiddleware
+from app.services.admission import ADMISSION, Admission
+
+
+def test_chunked_body_over_limit_is_413():
+    async def echo(request):
+        return JSONResponse({"n": len(await request.body())})
+
+    app = Starlette(routes=[Route("/echo", echo, methods=["POST"])])
+    app.add_middleware(BodySizeLimitMiddleware, max_bytes=10)
+    client = TestClient(app)
+
+    def chunks():  # no Content-Length: sent with Transfer-Encoding: chunked
+        yield b"12345"
+        yield b"67890"
+        yield b"abcde"
+
+    assert client.post("/echo", content=chunks()).status_code == 413
+    assert client.post("/echo", content=b"12345").json() == {"n": 5}
+    assert client.post("/echo", content=b"x" * 11).status_code == 413
+
+
+def test_admission_budgets():
+    adm = Admission(global_units=4, client_units=3)
+    assert adm.weight(0) == 1 and adm.weight(10 ** 12) == 3
+    assert adm.try_acquire("a", 3)
+    assert not adm.try_acquire("a", 1)        # client budget
+    assert adm.try_acquire("b", 1)
+    assert not adm.try_acquire("c", 1)        # global budget
+    adm.release("a", 3)
+    assert adm.try_acquire("c", 1)
+    assert adm.stats() == {"in_flight_units": 2, "clients": 2, "rejected": 2}
+
+
+def test_saturated_worker_gets_429(client, monkeypatch):
+    assert ADMISSION.in_flight == 0             # earlier requests released their units
+    monkeypatch.setattr(ADMISSION, "global_units", 2)
+    assert ADMISSION.try_acquire("someone-else", 2)
+    try:
+        r = client.post("/analyze/text", json={"text": "Short text."})
+        assert r.status_code == 429
+        assert int(r.headers["Retry-After"]) > 0
+        assert client.get("/health").status_code == 200   # light routes are not limited
+    finally:
+        ADMISSION.release("someone-else", 2)
+    assert client.post("/analyze/text", json={"text": "Short text."}).status_code == 200
@@ -0,0 +1,35 @@
+# tests/test_metrics.py
+import io
+import re
+
+from app.services import metrics
+
+
+def test_histogram_buckets_are_cumulative():
+    h = metrics.Histogram("t_seconds", "test", buckets=[0.1, 1.0])
+    for v in (0.05, 0.5, 0.5, 5.0):
+        h.observe(v, stage="x")
+    lines = h.render()
+    assert 't_seconds_bucket{stage="x",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{stage="x",le="1.0"} 3' in lines
+    assert 't_seconds_bucket{stage="x",le="+Inf"} 4' in lines
+    assert 't_seconds_count{stage="x"} 4' in lines
+
+
+def test_metrics_endpoint(client, sample_pdf_bytes):
+    files = {"file": ("in.pdf", io.BytesIO(sample_pdf_bytes), "application/pdf")}
+    doc_id = client.post("/upload", files=files).json()["doc_id"]
+    assert client.post(f"/analyze?doc_id={doc_id}").status_code == 200
+    assert client.post(f"/revise?doc_id={doc_id}&fmt=txt").status_code == 200
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    body = r.text
+    # route labels use the template, not the raw path
+    assert 'route="/analyze"' in body and doc_id not in body
+    for stage in ("extraction", "languagetool", "spacy", "readability", "rendering"):
+        assert re.search(rf'grammar_stage_duration_seconds_count\{{stage="{stage}"\}} [1-9]', body), stage
+    for gauge in ("grammar_jobs_queued", "grammar_jobs_in_flight", "grammar_data_dir_bytes",
+                  'grammar_cache_hit_ratio{cache="reports"}', 'grammar_rule_calls_total{rule="style"}'):
+        assert gauge in body
@@ -0,0 +1,10 @@
+# tests/test_models.py
+from app.services import grammar, models, rules
+
+
+def test_single_language_tool_per_process():
+    assert grammar.LT() is models.LT()
+    assert rules.nlp is models.nlp
+    stats = models.stats()
+    assert "load_seconds" in stats["language_tool"]
+    assert "process" in stats
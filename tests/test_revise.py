@@ -2,6 +2,8 @@
 import io
 import os
 import fitz
+# captured before the conftest stub replaces it for the route tests
+from app.services.revise import auto_correct_text as _real_auto_correct
 
 
 def _upload(client, filename: str, b: bytes, mime: str) -> str:
@@ -57,3 +59,145 @@ def test_revise_to_pdf(client, sample_pdf_bytes):
         assert doc.page_count >= 1
         txt = doc[0].get_text()
         assert "sample" in txt or "Sample" in txt
+
+
+def test_auto_correct_reuses_cached_analysis(monkeypatch):
+    import uuid
+    from app.services import analyze, models
+
+    class _Match:
+        offset, errorLength = 0, 6
+        message, ruleId, ruleIssueType = "Typo", "FAKE_RULE", "misspelling"
+        replacements = ["Sample"]
+
+    checked = []
+
+    class _LT:
+        def check(self, text):
+            checked.append(text)
+            return [_Match()] if text.startswith("Smaple") else []
+
+    monkeypatch.setattr(models, "_LT", _LT())
+    seen = f"Smaple text {uuid.uuid4().hex}."
+    unseen = f"Smaple again {uuid.uuid4().hex}."
+    analyze.paragraph_issues([seen])
+    checked.clear()
+
+    fixed = _real_auto_correct([seen, unseen])
+    assert fixed[0].startswith("Sample text")
+    assert fixed[1].startswith("Sample again")
+    assert checked == [unseen]
+
+
+def test_pdf_revision_patches_only_changed_pages(tmp_path):
+    from app.services.extract import iter_pdf_blocks
+    from app.services.revise import revise_pdf_in_place
+
+    src = str(tmp_path / "two.pdf")
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 100), "A smaple sentence on page one.", fontsize=12)
+    doc.new_page().insert_text((72, 100), "Page two is already fine.", fontsize=12)
+    doc.save(src)
+    doc.close()
+
+    blocks = list(iter_pdf_blocks(src))
+    corrected = [text.replace("smaple", "sample") for _, _, text in blocks]
+    out = revise_pdf_in_place(src, blocks, corrected, str(tmp_path / "corrected.pdf"))
+
+    with fitz.open(src) as before, fitz.open(out) as after:
+        assert after.page_count == 2
+        assert "sample" in after[0].get_text() and "smaple" not in after[0].get_text()
+        assert after[1].read_contents() == before[1].read_contents()
+
+
+def test_pdf_revision_embeds_only_a_font_subset(tmp_path):
+    from app.services import layout
+    from app.services.extract import iter_pdf_blocks
+    from app.services.revise import revise_pdf_in_place
+
+    src = str(tmp_path / "dash.pdf")
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 100), "Hello smaple world - test.", fontsize=12)
+    other = doc.new_page()
+    other.insert_font(fontname="F1", fontfile=layout.pick_fontfile())   # a full TTF the edit must not touch
+    other.insert_text((72, 100), "Unchanged \u2014 page.", fontname="F1", fontsize=12)
+    doc.save(src)
+    doc.close()
+
+    blocks = list(iter_pdf_blocks(src))
+    # the em dash is not Latin-1, so the Unicode TTF has to be embedded
+    corrected = [text.replace("smaple", "sample").replace(" - ", " \u2014 ") for _, _, text in blocks]
+    out = revise_pdf_in_place(src, blocks, corrected, str(tmp_path / "corrected.pdf"))
+
+    # the update adds only a subset; the original's full TTF is carried over as-is
+    assert os.path.getsize(out) - os.path.getsize(src) < 200_000
+    with fitz.open(src) as before, fitz.open(out) as after:
+        assert "Hello sample world \u2014 test." in after[0].get_text()
+        assert after[1].get_fonts() == before[1].get_fonts()
+
+
+def test_docx_revision_keeps_run_formatting(tmp_path):
+    import docx
+    from app.services.revise import revise_docx_in_place
+
+    src = str(tmp_path / "styled.docx")
+    d = docx.Document()
+    p = d.add_paragraph(style="Heading 1")
+    p.add_run("This is a ").bold = True
+    p.add_run("smaple")
+    p.add_run(" heading.").italic = True
+    d.add_paragraph("Untouched body text.")
+    d.save(src)
+
+    paragraphs = ["This is a smaple heading.", "Untouched body text."]
+    corrected = ["This is a sample heading.", "Untouched body text."]
+    out = revise_docx_in_place(src, paragraphs, corrected, str(tmp_path / "corrected.docx"))
+
+    p = docx.Document(out).paragraphs[0]
+    assert p.text == "This is a sample heading."
+    assert p.style.name == "Heading 1"
+    assert [r.text for r in p.runs] == ["This is a ", "sample", " heading."]
+    assert p.runs[0].bold and p.runs[2].italic
+
+
+def test_revise_stores_corrections_and_renders_on_download(client, monkeypatch):
+    from app.services import revise as revise_mod
+    from app.utils.storage import original_path
+    import docx
+
+    d = docx.Document()
+    d.add_paragraph("A lazy smaple that nobody has rendered yet.")
+    buf = io.BytesIO()
+    d.save(buf)
+    doc_id = _upload(client, "lazy.docx", buf.getvalue(),
+                     "application/vnd.openxmlformats-officedocument.wordprocessingml.document")
+
+    r = client.post(f"/revise?doc_id={doc_id}")
+    assert r.status_code == 200, r.text
+    payload = r.json()
+    assert "corrected_path" not in payload and payload["paragraphs"] == 1
+    doc_dir = os.path.dirname(original_path(doc_id))
+    assert not any(f.startswith("corrected.") and f != "corrected.json" for f in os.listdir(doc_dir))
+
+    renders = []
+    real_write_txt = revise_mod.write_txt
+    monkeypatch.setattr(revise_mod, "write_txt", lambda *a: renders.append(a) or real_write_txt(*a))
+    url = payload["downloads"]["txt"]
+    assert client.get(url).text == "A lazy sample that nobody has rendered yet.\n"
+    assert client.get(url).status_code == 200
+    assert len(renders) == 1                  # second download served from the render cache
+
+    # new corrections invalidate the rendered formats
+    monkeypatch.setattr(revise_mod, "REVISE_VERSION", revise_mod.REVISE_VERSION + 1)
+    monkeypatch.setattr(revise_mod, "auto_correct_text", lambda ps: [p.upper() for p in ps])
+    assert client.post(f"/revise?doc_id={doc_id}").json()["corrections_hash"] != payload["corrections_hash"]
+    assert client.get(url).text == "A LAZY SMAPLE THAT NOBODY HAS RENDERED YET.\n"
+    assert len(renders) == 2
+
+    # serving a current render reads the small manifest, not corrected.json
+    read = []
+    real_read_json = revise_mod._read_json
+    monkeypatch.setattr(revise_mod, "_read_json", lambda path: read.append(path) or real_read_json(path))
+    assert revise_mod.rendered_output(original_path(doc_id), doc_dir, "txt") is not None
+    assert [os.path.basename(p) for p in read] == ["renders.json"]
+    assert revise_mod._LOCKS == {}            # per-folder locks are dropped once released
@@ -0,0 +1,20 @@
+# tests/test_rules.py
+from app.services import rules as R
+
+
+def test_context_parses_once(monkeypatch):
+    calls = []
+    real_nlp = R.nlp()
+    orig_pipe = real_nlp.pipe
+
+    def _counting_pipe(texts, **kw):
+        texts = list(texts)
+        calls.append(len(texts))
+        return orig_pipe(texts, **kw)
+
+    monkeypatch.setattr(real_nlp, "pipe", _counting_pipe)
+    ctx = R.AnalysisContext(["First paragraph here.", "The report was written by the team."])
+    R.clarity_long_sentences(ctx)
+    R.passive_voice_issues(ctx)
+    R.sent_tokens(ctx)
+    assert calls == [2]
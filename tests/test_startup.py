@@ -0,0 +1,14 @@
+# tests/test_startup.py
+import os
+import subprocess
+import sys
+
+HEAVY = ("spacy", "language_tool_python", "fitz", "docx", "textstat", "magic")
+
+
+def test_app_import_leaves_heavy_dependencies_unloaded():
+    # fresh interpreter: the test session itself has already imported everything
+    code = "import sys, app.main; print(' '.join(m for m in %r if m in sys.modules))" % (HEAVY,)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
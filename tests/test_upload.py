@@ -1,5 +1,11 @@
+import asyncio
+import hashlib
 import io
 
+import pytest
+
+from app.utils import storage
+
 def test_upload_pdf(client, sample_pdf_bytes):
     files = {"file": ("sample.pdf", io.BytesIO(sample_pdf_bytes), "application/pdf")}
     r = client.post("/upload", files=files)
@@ -19,3 +25,20 @@ def test_upload_wrong_ext(client, sample_pdf_bytes):
     files = {"file": ("bad.txt", io.BytesIO(sample_pdf_bytes), "text/plain")}
     r = client.post("/upload", files=files)
     assert r.status_code in (400, 415)
+
+def test_identical_upload_is_deduplicated(client, sample_pdf_bytes):
+    files = lambda: {"file": ("dup.pdf", io.BytesIO(sample_pdf_bytes), "application/pdf")}
+    first = client.post("/upload", files=files()).json()
+    second = client.post("/upload", files=files()).json()
+    assert first["doc_id"] == second["doc_id"]
+    assert storage.file_sha256(first["stored_path"]) == hashlib.sha256(sample_pdf_bytes).hexdigest()
+
+def test_upload_over_limit_is_413(client, sample_pdf_bytes, monkeypatch):
+    monkeypatch.setattr(storage, "MAX_UPLOAD_BYTES", len(sample_pdf_bytes) - 1)
+    files = {"file": ("big.pdf", io.BytesIO(sample_pdf_bytes), "application/pdf")}
+    assert client.post("/upload", files=files).status_code == 413
+    # the size is also enforced while copying when the part size is unknown
+    upload = storage.UploadFile(io.BytesIO(sample_pdf_bytes), filename="big.pdf")
+    with pytest.raises(storage.HTTPException) as exc:
+        asyncio.run(storage.save_secure(upload))
+    assert exc.value.status_code == 413
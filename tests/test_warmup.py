@@ -0,0 +1,66 @@
+# tests/test_warmup.py
+from app.services import warmup
+
+
+def test_ready_reports_warm_up(client, monkeypatch):
+    monkeypatch.setattr(warmup, "_STATE", {"status": "warming", "components": {}, "error": None})
+    assert client.get("/ready").status_code == 503
+    assert client.get("/health").status_code == 200
+
+    state = warmup.warm_up()
+    assert state["status"] == "ready", state
+    assert set(state["components"]) == {"language_tool", "spacy", "check"}
+    r = client.get("/ready")
+    assert r.status_code == 200
+    assert "spacy" in r.json()["models"]
+
+
+def test_warm_up_needs_no_flagged_errors(monkeypatch):
+    monkeypatch.setattr(warmup, "_STATE", {"status": "cold", "components": {}, "error": None})
+    monkeypatch.setattr(warmup.config, "WARMUP_TEXT", "Nothing wrong here.")
+    assert warmup.warm_up()["status"] == "ready"
+
+
+def _failing_lt(monkeypatch, failures):
+    from app.services import models
+    calls = []
+
+    def flaky(*args, **kwargs):
+        calls.append(1)
+        if len(calls) <= failures:
+            raise RuntimeError("LanguageTool server did not start")
+        return real(*args, **kwargs)
+
+    real = models.LanguageTool
+    monkeypatch.setattr(models, "LanguageTool", flaky)
+    monkeypatch.setattr(models, "_LT", None)
+    monkeypatch.setattr(warmup.config, "WARMUP_RETRY_SECONDS", 0.0)
+    monkeypatch.setattr(warmup, "_STATE", {"status": "cold", "components": {}, "error": None})
+    return calls
+
+
+def test_failed_warm_up_is_retried(monkeypatch):
+    calls = _failing_lt(monkeypatch, failures=2)
+    state = warmup.warm_up()
+    assert state["status"] == "ready" and state["attempts"] == 3 and state["error"] is None
+    assert len(calls) == 3
+
+
+def test_failed_warm_up_is_not_ready(client, monkeypatch):
+    _failing_lt(monkeypatch, failures=100)
+    monkeypatch.setattr(warmup.config, "WARMUP_ATTEMPTS", 2)
+    state = warmup.warm_up()
+    assert state["status"] == "failed" and "did not start" in state["error"]
+    assert client.get("/ready").status_code == 503
+    health = client.get("/health")
+    assert health.status_code == 200
+    assert health.json()["warmup"] == {"status": "failed", "error": state["error"], "attempts": 2}
+
+
+def test_background_warm_up_keeps_retrying_after_failing(monkeypatch):
+    calls = _failing_lt(monkeypatch, failures=3)
+    monkeypatch.setattr(warmup.config, "WARMUP_ATTEMPTS", 2)
+    monkeypatch.setattr(warmup.config, "WARMUP_RETRY_MAX_SECONDS", 0.0)
+    warmup._warm_until_ready()
+    assert warmup.state()["status"] == "ready"
+    assert len(calls) == 4